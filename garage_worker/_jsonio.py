@@ -0,0 +1,62 @@
+"""
+JSON encoding and atomic cache-file writes shared by the device modules.
+Uses orjson when installed (pip install garage-worker[fast]), the stdlib json otherwise.
+"""
+
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Union
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    loads = orjson.loads
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def dumps_indented(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_INDENT_2)
+except ImportError:  # orjson is optional, fall back to the stdlib encoder
+    loads = json.loads
+
+    # Same compact UTF-8 output as orjson
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+    def dumps_indented(obj: Any) -> bytes:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode()
+
+
+def write_atomic(path: Union[str, Path], data: bytes) -> bool:
+    """
+    Replace a file's contents atomically, leaving it readable only by the current user
+
+    Returns:
+        True if written, False if it failed (the error is logged and no temp file is left behind)
+    """
+    path = Path(path)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # mkstemp creates the file with 0600 permissions
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    except OSError as e:
+        logger.warning("Could not write %s: %s", path, e)
+        return False
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("Could not write %s: %s", path, e)
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        return False
+    return True
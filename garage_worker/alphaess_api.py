@@ -4,65 +4,425 @@ Retrieves real-time power data from AlphaESS solar battery storage system
 You'll need a registered developer account to get AppID and AppSecret
 """
 
+import copy
 import hashlib
+import logging
+import math
 import os
+import sys
 import time
+import threading
 import requests
-from typing import Dict, Any, Optional
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from itertools import islice
+from pathlib import Path
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
+from urllib3.util.retry import Retry
+
+try:
+    from garage_worker._jsonio import dumps as _dumps, dumps_indented as _dumps_indented, loads as _loads, write_atomic
+except ImportError:  # run as a script from the package directory (python alphaess_api.py)
+    from _jsonio import dumps as _dumps, dumps_indented as _dumps_indented, loads as _loads, write_atomic
+
+logger = logging.getLogger(__name__)
+
+# Fields of a getOneDayPowerBySn record, in DataFrame column order
+ONE_DAY_POWER_COLUMNS = ["uploadTime", "ppv", "cobat", "load", "gridCharge", "feedIn", "pChargingPile"]
+
+# Display block for one getOneDayPowerBySn record, filled with str.format_map
+_ONE_DAY_POWER_RECORD = (
+    "Record {_idx} - {uploadTime}\n"
+    "  PV Power:            {ppv:>10.2f} W\n"
+    "  Battery Power:       {cobat:>10.2f} W\n"
+    "  Load:                {load:>10.2f} W\n"
+    "  Grid Charge:         {gridCharge:>10.2f} W\n"
+    "  Feed-in:             {feedIn:>10.2f} W\n"
+    "  Charging Pile:       {pChargingPile:>10.2f} W\n"
+)
+
+# Declarative field tables shared by the fetch_* (JSON) and print_* (text) views.
+# Each field is (API key, output key, display label, display format, default); a label of
+# None marks a field that only appears in the fetch_* output.
+_W = "{:>10.2f} W"
+_KW = "{:>10.2f} kW"
+_KWH = "{:>10.2f} kWh"
+_PCT = "{:>10.2f} %"
+
+_POWER_PV = (
+    ("ppv", "pv_total_power_w", "PV Total Power:", _W, 0),
+)
+_POWER_BATTERY = (
+    ("pbat", "battery_power_w", "Battery Power:", _W, 0),
+    ("soc", "battery_soc_percent", "Battery SOC:", _PCT, 0),
+)
+_POWER_LOAD_GRID = (
+    ("pload", "load_power_w", "Load Power:", _W, 0),
+    ("pgrid", "grid_power_w", "Grid Power:", _W + " ({grid_status})", 0),
+)
+_POWER_EV = (
+    ("pev", "ev_charger_total_w", "EV Charger Total:", _W, 0),
+)
+POWER_SCHEMA = _POWER_PV + _POWER_BATTERY + _POWER_LOAD_GRID + _POWER_EV
+
+PV_DETAILS_SCHEMA = tuple((f"ppv{i}", f"pv{i}_w", f"  - PV{i}:", _W, 0) for i in range(1, 5))
+GRID_DETAILS_SCHEMA = tuple((f"pmeterL{i}", f"l{i}_w", f"  - L{i}:", _W, 0) for i in range(1, 4))
+EV_DETAILS_SCHEMA = tuple((f"ev{i}Power", f"ev{i}_w", f"  - EV{i}:", _W, 0) for i in range(1, 5))
+
+# Display sections of the power view: (fields, detail API key, detail output key, detail fields)
+POWER_SECTIONS = (
+    (_POWER_PV, "ppvDetailData", "pv_details", PV_DETAILS_SCHEMA),
+    (_POWER_BATTERY, None, None, ()),
+    (_POWER_LOAD_GRID, "pgridDetailData", "grid_details", GRID_DETAILS_SCHEMA),
+    (_POWER_EV, "pevDetailData", "ev_details", EV_DETAILS_SCHEMA),
+)
+
+# Sectioned views: (output key, display heading, fields)
+SUMMARY_SECTIONS = (
+    ("today_data", "TODAY'S DATA:", (
+        ("epvtoday", "generation_kwh", "  Generation:", _KWH, 0),
+        ("eload", "load_kwh", "  Load:", _KWH, 0),
+        ("eoutput", "feed_in_kwh", "  Feed-in:", _KWH, 0),
+        ("einput", "consumed_kwh", "  Consumed:", _KWH, 0),
+        ("echarge", "charged_kwh", "  Charged:", _KWH, 0),
+        ("edischarge", "discharged_kwh", "  Discharged:", _KWH, 0),
+        ("todayIncome", "income", "  Income:", "{:>10.2f} {currency}", 0),
+        ("moneyType", "income_currency", None, None, ""),
+    )),
+    ("total", "TOTAL:", (
+        ("epvtotal", "total_generation_kwh", "  Total Generation:", _KWH, 0),
+        ("totalIncome", "total_profit", "  Total Profit:", "{:>10.2f} {currency}", 0),
+        ("moneyType", "total_profit_currency", None, None, ""),
+    )),
+    ("efficiency", "EFFICIENCY:", (
+        ("eselfConsumption", "self_consumption_percent", "  Self-consumption:", _PCT, 0),
+        ("eselfSufficiency", "self_sufficiency_percent", "  Self-sufficiency:", _PCT, 0),
+    )),
+    ("environmental_impact", "ENVIRONMENTAL IMPACT:", (
+        ("treeNum", "trees_planted", "  Trees Planted:", "{:>10.2f}", 0),
+        ("carbonNum", "co2_reduction_kg", "  CO2 Reduction:", "{:>10.2f} kg", 0),
+    )),
+)
+
+ENERGY_SECTIONS = (
+    ("generation", "GENERATION:", (
+        ("epv", "pv_generation_kwh", "  PV Generation:", _KWH, 0),
+    )),
+    ("battery", "BATTERY:", (
+        ("eCharge", "total_charged_kwh", "  Total Charged:", _KWH, 0),
+        ("eDischarge", "total_discharged_kwh", "  Total Discharged:", _KWH, 0),
+        ("eGridCharge", "grid_charged_kwh", "  Grid Charged:", _KWH, 0),
+    )),
+    ("grid", "GRID:", (
+        ("eInput", "grid_consumption_kwh", "  Grid Consumption:", _KWH, 0),
+        ("eOutput", "feed_in_kwh", "  Feed-in:", _KWH, 0),
+    )),
+    ("ev_charging", "EV CHARGING:", (
+        ("eChargingPile", "charging_pile_kwh", "  Charging Pile:", _KWH, 0),
+    )),
+)
+
+SYSTEM_SCHEMA = (
+    ("sysSn", "serial_number", "  Serial Number:", "{}", "N/A"),
+    ("emsStatus", "ems_status", "  EMS Status:", "{}", "N/A"),
+    ("minv", "inverter_model", "  Inverter Model:", "{}", "N/A"),
+    ("poinv", "inverter_power_kw", "  Inverter Power:", _KW, 0),
+    ("popv", "pv_nominal_power_kw", "  PV Nominal Power:", _KW, 0),
+    ("mbat", "battery_model", "  Battery Model:", "{}", "N/A"),
+    ("cobat", "battery_capacity_kwh", "  Battery Capacity:", _KWH, 0),
+    ("surplusCobat", "remaining_capacity_kwh", "  Remaining Capacity:", _KWH, 0),
+    ("usCapacity", "available_percent", "  Available %:", _PCT, 0),
+)
+
+# Timeline records are displayed through _ONE_DAY_POWER_RECORD, so these carry no labels
+POWER_RECORD_SCHEMA = (
+    ("uploadTime", "upload_time", None, None, "N/A"),
+    ("ppv", "pv_power_w", None, None, 0),
+    ("cobat", "battery_power_w", None, None, 0),
+    ("load", "load_w", None, None, 0),
+    ("gridCharge", "grid_charge_w", None, None, 0),
+    ("feedIn", "feed_in_w", None, None, 0),
+    ("pChargingPile", "charging_pile_w", None, None, 0),
+)
+
+# API field -> fetch_one_day_power record key, used to name DataFrame-derived output
+_POWER_COL_MAP = {key: out for key, out, _, _, _ in POWER_RECORD_SCHEMA}
+
+CHARGE_SCHEMA = (
+    ("batHighCap", "charging_stops_at_soc_percent", "Charging Stops at:", "{:>10.2f} % SOC", 0),
+)
+CHARGE_PERIODS_SCHEMA = (
+    ("timeChaf1", "period_1_start", None, None, "N/A"),
+    ("timeChae1", "period_1_end", None, None, "N/A"),
+    ("timeChaf2", "period_2_start", None, None, "N/A"),
+    ("timeChae2", "period_2_end", None, None, "N/A"),
+)
+
+
+def _project(src: Dict[str, Any], schema: Tuple) -> Dict[str, Any]:
+    """Map the API fields of ``src`` to their output keys"""
+    return {out: src.get(key, default) for key, out, _, _, default in schema}
+
+
+def _render(src: Dict[str, Any], schema: Tuple, **extra: Any) -> List[str]:
+    """Format the labelled fields of ``src`` as aligned display lines"""
+    return [f"{label:<23}{fmt.format(src.get(key, default), **extra)}"
+            for key, _, label, fmt, default in schema if label]
+
+
+def _render_sections(src: Dict[str, Any], sections: Tuple, **extra: Any) -> List[str]:
+    """Format a sectioned view, separating the sections with a blank line"""
+    lines: List[str] = []
+    for _, heading, schema in sections:
+        if lines:
+            lines.append("")
+        lines.append(heading)
+        lines.extend(_render(src, schema, **extra))
+    return lines
+
+
+# Grid flow direction indexed by the sign of pgrid + 1 (positive pgrid means importing)
+_GRID_STATUS = ("exporting", "zero", "importing")
+
+
+def _query_date_str(query_date: Union[str, date]) -> str:
+    """Normalize a query date to the yyyy-MM-dd string the API expects"""
+    if isinstance(query_date, datetime):
+        query_date = query_date.date()
+    return query_date.isoformat() if isinstance(query_date, date) else query_date
+
+
+def _grid_status(pgrid: float) -> str:
+    return _GRID_STATUS[(pgrid > 0) - (pgrid < 0) + 1]
 
 
 class AlphaESSAPI:
     """API for interacting with AlphaESS OpenAPI"""
 
     BASE_URL = "https://openapi.alphaess.com/api"
-
-    def __init__(self, app_id: Optional[str] = None, app_secret: Optional[str] = None):
+    TIMEOUT = (3.05, 10)  # (connect, read) seconds
+    MAX_CONNECTIONS = 10  # kept-alive connections per host, also the cap on concurrent requests
+
+    # Full URL of each endpoint, built once rather than per request
+    URLS = {
+        "getLastPowerData": BASE_URL + "/getLastPowerData",
+        "getSumDataForCustomer": BASE_URL + "/getSumDataForCustomer",
+        "getEssList": BASE_URL + "/getEssList",
+        "getOneDayPowerBySn": BASE_URL + "/getOneDayPowerBySn",
+        "getOneDateEnergyBySn": BASE_URL + "/getOneDateEnergyBySn",
+        "getChargeConfigInfo": BASE_URL + "/getChargeConfigInfo",
+    }
+
+    # Seconds a successful response is served from memory, per endpoint
+    CACHE_TTLS = {
+        "getEssList": 3600,
+        "getChargeConfigInfo": 300,
+        "getOneDateEnergyBySn": 60,
+        "getSumDataForCustomer": 30,
+        "getLastPowerData": 2,
+        "getOneDayPowerBySn": 60,
+    }
+    # Data for settled days no longer changes
+    HISTORICAL_TTL = 7 * 24 * 3600
+    # Whole days that must pass after a day ends before it counts as settled: late uploads
+    # can still arrive, and the host's date may run ahead of the system's time zone
+    SETTLE_DAYS = 1
+    # Responses kept in memory; past this, expired and then oldest entries are dropped
+    CACHE_MAX_ENTRIES = 256
+    # Endpoints whose settled-day responses are persisted when cache_dir is set
+    DISK_CACHED_ENDPOINTS = ("getOneDateEnergyBySn", "getOneDayPowerBySn")
+
+    def __init__(self, app_id: Optional[str] = None, app_secret: Optional[str] = None,
+                 system_sn: Optional[str] = None, cache_dir: Optional[Union[str, Path]] = None,
+                 cache_ttls: Optional[Dict[str, float]] = None,
+                 timeout: Optional[Union[float, Tuple[float, float]]] = None,
+                 cache_fallback: bool = False):
         """
         Initialize the AlphaESS API client
 
         Args:
             app_id: Developer ID (AppID) from AlphaESS portal
             app_secret: App Secret from AlphaESS portal
+            system_sn: Default System Serial Number for calls that omit one (default: ALPHAESS_SN env)
+            cache_dir: Optional directory to persist settled-day energy/power responses across runs
+            cache_ttls: Optional per-endpoint TTL overrides merged over CACHE_TTLS, also applied to
+                settled days instead of HISTORICAL_TTL (0 disables in-memory caching)
+            timeout: Request timeout in seconds, or a (connect, read) tuple (default: TIMEOUT)
+            cache_fallback: Serve the last good (expired) response when a request fails
         """
         self.app_id = app_id if app_id is not None else os.environ.get("ALPHAESS_APP_ID")
         self.app_secret = app_secret if app_secret is not None else os.environ.get("ALPHAESS_APP_SECRET")
+        self.system_sn = system_sn if system_sn is not None else os.environ.get("ALPHAESS_SN")
+        # SHA512 state already fed with the constant appId + appSecret prefix
+        self._sig_hash = hashlib.sha512(f"{self.app_id}{self.app_secret}".encode())
+        self._cached_ts = -1
+        self._cached_headers: Dict[str, str] = {}
+        # (endpoint, params) -> (stored_at, response, ETag)
+        self._cache: Dict[Tuple, Tuple[float, Dict[str, Any], Optional[str]]] = {}
+        self._ttl_overrides = dict(cache_ttls or {})
+        self.cache_ttls = {**self.CACHE_TTLS, **self._ttl_overrides}
+        # (endpoint, params) -> Future of the request currently fetching it
+        self._inflight: Dict[Tuple, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.timeout = timeout if timeout is not None else self.TIMEOUT
+        self.cache_fallback = cache_fallback
+
+        # One pooled session so consecutive calls reuse the same TCP/TLS connection
+        self._session = requests.Session()
+        # Headers that never change are sent from the session; _get_headers only adds the signed part
+        self._session.headers.update({
+            "Content-Type": "application/json",
+            "User-Agent": "garage-worker",
+            "appId": self.app_id,
+        })
+        adapter = HTTPAdapter(
+            pool_connections=1,  # every request goes to the same host
+            pool_maxsize=self.MAX_CONNECTIONS,
+            max_retries=Retry(
+                total=3,
+                connect=2,
+                read=2,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=frozenset(["GET"]),
+            ),
+        )
+        self._session.mount("https://", adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying HTTP session and release pooled connections"""
+        self._session.close()
 
     def _generate_signature(self, timestamp: int) -> str:
         """
         Generate SHA512 signature for API authentication
 
+        The AlphaESS OpenAPI verifies the sign header as SHA512 only, so the digest
+        cannot be swapped for a (SHA-NI accelerated) SHA256 one.
+
         Args:
             timestamp: Unix timestamp (seconds)
 
         Returns:
             SHA512 hash string
         """
-        # Concatenate: appId + appSecret + timestamp
-        sign_string = f"{self.app_id}{self.app_secret}{timestamp}"
-
-        # Generate SHA512 hash
-        signature = hashlib.sha512(sign_string.encode()).hexdigest()
-
-        return signature
+        # appId + appSecret + timestamp: continue from the pre-hashed prefix and only feed the timestamp
+        sign_hash = self._sig_hash.copy()
+        sign_hash.update(str(timestamp).encode("ascii"))
+        return sign_hash.hexdigest()
 
     def _get_headers(self) -> Dict[str, str]:
         """
-        Generate headers for API request
+        Generate the per-request signature headers (appId is a session header)
+
+        The signature only has one-second resolution, so the headers are
+        cached and reused for every request made within the same second.
+        A copy is returned, so callers may add request-specific headers.
 
         Returns:
-            Dictionary of headers including appId, timeStamp, and sign
+            Dictionary with the timeStamp and sign headers
         """
-        timestamp = int(time.time())  # Unix timestamp in seconds
+        timestamp = time.time_ns() // 1_000_000_000  # Unix timestamp in seconds, without a float round-trip
+        if timestamp == self._cached_ts:
+            return self._cached_headers.copy()
+
         signature = self._generate_signature(timestamp)
 
         headers = {
-            "appId": self.app_id,
             "timeStamp": str(timestamp),
             "sign": signature,
-            "Content-Type": "application/json"
         }
 
-        return headers
+        self._cached_headers = headers
+        self._cached_ts = timestamp
+        return headers.copy()
+
+    @classmethod
+    def _is_settled_day(cls, params: Optional[Dict[str, str]]) -> bool:
+        """Whether the query is for a day far enough in the past that its data is final"""
+        query_date = (params or {}).get("queryDate")
+        return bool(query_date) and query_date < (date.today() - timedelta(days=cls.SETTLE_DAYS)).isoformat()
+
+    def _cache_ttl(self, endpoint: str, params: Optional[Dict[str, str]]) -> float:
+        """Time-to-live for a response, longer for queries about settled days unless overridden"""
+        if endpoint in self._ttl_overrides:
+            return self._ttl_overrides[endpoint]
+        if self._is_settled_day(params):
+            return self.HISTORICAL_TTL
+        return self.cache_ttls.get(endpoint, 0)
+
+    @staticmethod
+    def _cache_key(endpoint: str, params: Optional[Dict[str, str]]) -> Tuple:
+        return endpoint, tuple(sorted((params or {}).items()))
+
+    def _cache_put(self, endpoint: str, params: Optional[Dict[str, str]], data: Dict[str, Any],
+                   etag: Optional[str] = None) -> None:
+        """Store a successful response, and its ETag if the server sent one, in the cache"""
+        key = self._cache_key(endpoint, params)
+        now = time.monotonic()
+        with self._inflight_lock:
+            # Re-insert at the end so the dict stays ordered from least to most recently stored
+            self._cache.pop(key, None)
+            self._cache[key] = (now, data, etag)
+            if len(self._cache) > self.CACHE_MAX_ENTRIES:
+                self._cache_evict(now)
+
+    def _cache_evict(self, now: float) -> None:
+        """Shrink the cache to CACHE_MAX_ENTRIES, expired entries first; call with _inflight_lock held"""
+        expired = [key for key, entry in self._cache.items()
+                   if now - entry[0] >= self._cache_ttl(key[0], dict(key[1]))]
+        for key in expired:
+            del self._cache[key]
+        excess = len(self._cache) - self.CACHE_MAX_ENTRIES
+        if excess > 0:
+            for key in list(islice(self._cache, excess)):
+                del self._cache[key]
+
+    def invalidate_cache(self, endpoint: Optional[str] = None) -> None:
+        """
+        Drop cached responses from memory so the next call goes to the API
+
+        Args:
+            endpoint: Only drop responses of this endpoint (default: all)
+        """
+        with self._inflight_lock:
+            if endpoint is None:
+                self._cache.clear()
+            else:
+                for key in [key for key in self._cache if key[0] == endpoint]:
+                    del self._cache[key]
+
+    def _disk_cache_path(self, endpoint: str, params: Optional[Dict[str, str]]) -> Optional[Path]:
+        """File holding a settled day's response, or None if this request is not disk-cached"""
+        if self.cache_dir is None or endpoint not in self.DISK_CACHED_ENDPOINTS or not self._is_settled_day(params):
+            return None
+        return self.cache_dir / endpoint / params["sysSn"] / f"{params['queryDate']}.json"
+
+    @staticmethod
+    def _disk_cache_read(path: Path) -> Optional[Dict[str, Any]]:
+        """Load a disk-cached response, None if missing or unreadable"""
+        try:
+            return _loads(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable cache file %s: %s", path, e)
+            return None
+
+    @staticmethod
+    def _disk_cache_write(path: Path, data: Dict[str, Any]) -> None:
+        """Atomically write a response to the disk cache"""
+        write_atomic(path, _dumps(data))
 
     @staticmethod
     def parse_system_sn(sn_arg: Optional[str] = None) -> str:
@@ -75,68 +435,125 @@ class AlphaESSAPI:
                 "System Serial Number not provided. Set ALPHAESS_SN environment variable or pass as argument.")
         return system_sn
 
-    def get_last_power_data(self, system_sn: Optional[str] = None) -> Dict[str, Any]:
+    def _system_sn(self, sn_arg: Optional[str] = None) -> str:
         """
-        Get real-time power data for a specific system
+        Get the system serial number from the argument or the client default, raise if every try fails
+        """
+        return self.parse_system_sn(sn_arg if sn_arg is not None else self.system_sn)
+
+    def _request(self, endpoint: str, params: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Perform a signed GET request against an AlphaESS endpoint
 
         Args:
-            system_sn: System Serial Number
+            endpoint: Endpoint name, e.g. "getLastPowerData"
+            params: Query parameters
+
+        Concurrent calls for the same endpoint and params share a single HTTP request.
+        Every caller gets its own copy, so mutating a result never alters the cached response.
 
         Returns:
-            Dictionary containing power data or error information
+            Parsed JSON response, or a dictionary with an "error" key if the request failed
         """
-        system_sn = self.parse_system_sn(system_sn)
-        url = f"{self.BASE_URL}/getLastPowerData"
+        key = self._cache_key(endpoint, params)
+        with self._inflight_lock:
+            entry = self._cache.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self._cache_ttl(endpoint, params):
+                return copy.deepcopy(entry[1])
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+
+        if not leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            data = self._fetch(endpoint, params, entry)
+            if "error" in data and self.cache_fallback and entry is not None:
+                logger.warning("Serving stale %s response after error: %s", endpoint, data["error"])
+                data = entry[1]
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(data)
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+        return copy.deepcopy(data)
+
+    def _fetch(self, endpoint: str, params: Optional[Dict[str, str]],
+               entry: Optional[Tuple[float, Dict[str, Any], Optional[str]]]) -> Dict[str, Any]:
+        """Fetch a response from disk cache or the network, revalidating an expired cache entry"""
+        disk_path = self._disk_cache_path(endpoint, params)
+        if disk_path is not None:
+            cached = self._disk_cache_read(disk_path)
+            if cached is not None:
+                self._cache_put(endpoint, params, cached)
+                return cached
+
         headers = self._get_headers()
-        params = {"sysSn": system_sn}
+        if entry is not None and entry[2]:
+            # Expired entry with an ETag: ask the server whether it changed
+            headers["If-None-Match"] = entry[2]
 
+        url = self.URLS.get(endpoint) or f"{self.BASE_URL}/{endpoint}"
         try:
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
+            response = self._session.get(url, headers=headers, params=params, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            logger.error("Request to %s failed: %s", endpoint, e)
+            return {"error": str(e)}
 
-            data = response.json()
+        logger.debug("%s: %d bytes, Content-Encoding=%s",
+                     endpoint, len(response.content), response.headers.get("Content-Encoding"))
 
-            # Check if request was successful
-            if data.get("code") == 200:
-                return data
-            else:
-                print(f"API Error: Code {data.get('code')}, Message: {data.get('msg')}")
-                return data
+        if response.status_code == 304 and entry is not None:
+            self._cache_put(endpoint, params, entry[1], entry[2])
+            return entry[1]
 
-        except requests.exceptions.RequestException as e:
-            print(f"Request failed: {e}")
+        if response.status_code != 200:
+            logger.error("Request to %s failed: HTTP %s", endpoint, response.status_code)
+            return {"error": f"HTTP {response.status_code}", "body": response.text[:200]}
+
+        try:
+            data = _loads(response.content)
+        except ValueError as e:
+            logger.error("Invalid JSON response from %s: %s", endpoint, e)
             return {"error": str(e)}
 
-    def get_system_summary(self, system_sn: Optional[str] = None) -> Dict[str, Any]:
+        # Check if request was successful
+        if data.get("code") == 200:
+            self._cache_put(endpoint, params, data, response.headers.get("ETag"))
+            if disk_path is not None:
+                self._disk_cache_write(disk_path, data)
+        else:
+            logger.warning("API Error: Code %s, Message: %s", data.get("code"), data.get("msg"))
+        return data
+
+    def get_last_power_data(self, system_sn: Optional[str] = None) -> Dict[str, Any]:
         """
-        Get system summary data including today's and total generation, consumption, etc.
+        Get real-time power data for a specific system
 
         Args:
             system_sn: System Serial Number
 
         Returns:
-            Dictionary containing system summary data or error information
+            Dictionary containing power data or error information
         """
-        system_sn = self.parse_system_sn(system_sn)
-        url = f"{self.BASE_URL}/getSumDataForCustomer"
-        headers = self._get_headers()
-        params = {"sysSn": system_sn}
-
-        try:
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
+        return self._request("getLastPowerData", {"sysSn": self._system_sn(system_sn)})
 
-            data = response.json()
+    def get_system_summary(self, system_sn: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get system summary data including today's and total generation, consumption, etc.
 
-            if data.get("code") == 200:
-                return data
-            else:
-                print(f"API Error: Code {data.get('code')}, Message: {data.get('msg')}")
-                return data
+        Args:
+            system_sn: System Serial Number
 
-        except requests.exceptions.RequestException as e:
-            print(f"Request failed: {e}")
-            return {"error": str(e)}
+        Returns:
+            Dictionary containing system summary data or error information
+        """
+        return self._request("getSumDataForCustomer", {"sysSn": self._system_sn(system_sn)})
 
     def get_system_list(self) -> Dict[str, Any]:
         """
@@ -145,94 +562,51 @@ class AlphaESSAPI:
         Returns:
             Dictionary containing list of systems or error information
         """
-        url = f"{self.BASE_URL}/getEssList"
-        headers = self._get_headers()
-
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-
-            data = response.json()
-
-            if data.get("code") == 200:
-                return data
-            else:
-                print(f"API Error: Code {data.get('code')}, Message: {data.get('msg')}")
-                return data
-
-        except requests.exceptions.RequestException as e:
-            print(f"Request failed: {e}")
-            return {"error": str(e)}
+        return self._request("getEssList")
 
-    def get_one_day_power(self, query_date: str, system_sn: Optional[str] = None) -> Dict[str, Any]:
+    def get_one_day_power(self, query_date: Union[str, date], system_sn: Optional[str] = None) -> Dict[str, Any]:
         """
         Get system power data for a specific day (time-series data)
 
         Args:
             system_sn: System Serial Number
-            query_date: Date in format yyyy-MM-dd (e.g., "2024-01-15")
+            query_date: Date, or a string in format yyyy-MM-dd (e.g., "2024-01-15")
 
         Returns:
             Dictionary containing power data timeline or error information
         """
-        system_sn = self.parse_system_sn(system_sn)
-        url = f"{self.BASE_URL}/getOneDayPowerBySn"
-        headers = self._get_headers()
-        params = {
-            "sysSn": system_sn,
-            "queryDate": query_date
-        }
+        return self._request("getOneDayPowerBySn", {"sysSn": self._system_sn(system_sn), "queryDate": _query_date_str(query_date)})
 
-        try:
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
-
-            data = response.json()
+    def get_many_days_power(self, query_dates: List[Union[str, date]], system_sn: Optional[str] = None,
+                            max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get power data timelines for several days, fetching them concurrently
 
-            if data.get("code") == 200:
-                return data
-            else:
-                print(f"API Error: Code {data.get('code')}, Message: {data.get('msg')}")
-                return data
+        Args:
+            query_dates: Dates, or strings in format yyyy-MM-dd
+            system_sn: System Serial Number
+            max_workers: Maximum number of requests in flight at once (default and upper bound: MAX_CONNECTIONS)
 
-        except requests.exceptions.RequestException as e:
-            print(f"Request failed: {e}")
-            return {"error": str(e)}
+        Returns:
+            List of responses in the same order as query_dates
+        """
+        system_sn = self._system_sn(system_sn)
+        max_workers = min(max_workers or self.MAX_CONNECTIONS, self.MAX_CONNECTIONS)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(lambda query_date: self.get_one_day_power(query_date, system_sn), query_dates))
 
-    def get_one_day_energy(self, query_date: str, system_sn: Optional[str] = None) -> Dict[str, Any]:
+    def get_one_day_energy(self, query_date: Union[str, date], system_sn: Optional[str] = None) -> Dict[str, Any]:
         """
         Get system energy data for a specific day (daily totals)
 
         Args:
             system_sn: System Serial Number
-            query_date: Date in format yyyy-MM-dd (e.g., "2024-01-15")
+            query_date: Date, or a string in format yyyy-MM-dd (e.g., "2024-01-15")
 
         Returns:
             Dictionary containing energy data or error information
         """
-        system_sn = self.parse_system_sn(system_sn)
-        url = f"{self.BASE_URL}/getOneDateEnergyBySn"
-        headers = self._get_headers()
-        params = {
-            "sysSn": system_sn,
-            "queryDate": query_date
-        }
-
-        try:
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
-
-            data = response.json()
-
-            if data.get("code") == 200:
-                return data
-            else:
-                print(f"API Error: Code {data.get('code')}, Message: {data.get('msg')}")
-                return data
-
-        except requests.exceptions.RequestException as e:
-            print(f"Request failed: {e}")
-            return {"error": str(e)}
+        return self._request("getOneDateEnergyBySn", {"sysSn": self._system_sn(system_sn), "queryDate": _query_date_str(query_date)})
 
     def get_charge_config(self, system_sn: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -244,26 +618,31 @@ class AlphaESSAPI:
         Returns:
             Dictionary containing charging configuration or error information
         """
-        system_sn = self.parse_system_sn(system_sn)
-        url = f"{self.BASE_URL}/getChargeConfigInfo"
-        headers = self._get_headers()
-        params = {"sysSn": system_sn}
-
-        try:
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
+        return self._request("getChargeConfigInfo", {"sysSn": self._system_sn(system_sn)})
 
-            data = response.json()
+    def get_all(self, query_date: Union[str, date], system_sn: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Retrieve every endpoint at once, issuing the six requests concurrently over the pooled session
 
-            if data.get("code") == 200:
-                return data
-            else:
-                print(f"API Error: Code {data.get('code')}, Message: {data.get('msg')}")
-                return data
+        Args:
+            query_date: Date, or a yyyy-MM-dd string, for the one-day energy and power endpoints
+            system_sn: System Serial Number
 
-        except requests.exceptions.RequestException as e:
-            print(f"Request failed: {e}")
-            return {"error": str(e)}
+        Returns:
+            Dictionary keyed by view name (as in AlphaESSClient.fetch_all) with the raw API responses
+        """
+        system_sn = self._system_sn(system_sn)
+        query_date = _query_date_str(query_date)
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            futures = {
+                "system_list": pool.submit(self.get_system_list),
+                "system_summary": pool.submit(self.get_system_summary, system_sn),
+                "power_data": pool.submit(self.get_last_power_data, system_sn),
+                "charge_config": pool.submit(self.get_charge_config, system_sn),
+                "one_day_energy": pool.submit(self.get_one_day_energy, query_date, system_sn),
+                "one_day_power": pool.submit(self.get_one_day_power, query_date, system_sn),
+            }
+            return {name: future.result() for name, future in futures.items()}
 
 
 class AlphaESSClient(AlphaESSAPI):
@@ -274,55 +653,48 @@ class AlphaESSClient(AlphaESSAPI):
         Args:
             system_sn: System Serial Number
         """
-        system_sn = self.parse_system_sn(system_sn)
-        data = self.get_last_power_data(system_sn)
+        system_sn = self._system_sn(system_sn)
+        sys.stdout.write(self._format_power_data(self.get_last_power_data(system_sn), system_sn) + "\n")
 
+    def _format_power_data(self, data: Dict[str, Any], system_sn: str) -> str:
+        """Format a getLastPowerData response for display"""
+        lines: List[str] = []
         if data.get("code") == 200:
             power_data = data.get("data", {})
 
-            print(f"\n{'=' * 50}")
-            print(f"Real-time Power Data for System: {system_sn}")
-            print(f"{'=' * 50}\n")
-
-            print(f"PV Total Power:        {power_data.get('ppv', 0):>10.2f} W")
-
-            # PV Details
-            pv_details = power_data.get('ppvDetailData', {})
-            if pv_details:
-                print(f"  - PV1:               {pv_details.get('ppv1', 0):>10.2f} W")
-                print(f"  - PV2:               {pv_details.get('ppv2', 0):>10.2f} W")
-                print(f"  - PV3:               {pv_details.get('ppv3', 0):>10.2f} W")
-                print(f"  - PV4:               {pv_details.get('ppv4', 0):>10.2f} W")
-
-            print(f"\nBattery Power:         {power_data.get('pbat', 0):>10.2f} W")
-            print(f"Battery SOC:           {power_data.get('soc', 0):>10.2f} %")
+            lines.append(f"\n{'=' * 50}")
+            lines.append(f"Real-time Power Data for System: {system_sn}")
+            lines.append(f"{'=' * 50}\n")
 
-            print(f"\nLoad Power:            {power_data.get('pload', 0):>10.2f} W")
+            grid_status = _grid_status(power_data.get('pgrid', 0)).capitalize()
+            for idx, (schema, detail_key, _, detail_schema) in enumerate(POWER_SECTIONS):
+                if idx:
+                    lines.append("")
+                lines.extend(_render(power_data, schema, grid_status=grid_status))
+                details = detail_key and power_data.get(detail_key)
+                if details:
+                    lines.extend(_render(details, detail_schema))
 
-            pgrid = power_data.get('pgrid', 0)
-            grid_status = "Importing" if pgrid > 0 else "Exporting" if pgrid < 0 else "Zero"
-            print(f"Grid Power:            {pgrid:>10.2f} W ({grid_status})")
-
-            # Grid Details
-            grid_details = power_data.get('pgridDetailData', {})
-            if grid_details:
-                print(f"  - L1:                {grid_details.get('pmeterL1', 0):>10.2f} W")
-                print(f"  - L2:                {grid_details.get('pmeterL2', 0):>10.2f} W")
-                print(f"  - L3:                {grid_details.get('pmeterL3', 0):>10.2f} W")
+            lines.append(f"\n{'=' * 50}\n")
+        else:
+            lines.append(f"Failed to retrieve data: {data}")
 
-            print(f"\nEV Charger Total:      {power_data.get('pev', 0):>10.2f} W")
+        return "\n".join(lines)
 
-            # EV Details
-            ev_details = power_data.get('pevDetailData', {})
-            if ev_details:
-                print(f"  - EV1:               {ev_details.get('ev1Power', 0):>10.2f} W")
-                print(f"  - EV2:               {ev_details.get('ev2Power', 0):>10.2f} W")
-                print(f"  - EV3:               {ev_details.get('ev3Power', 0):>10.2f} W")
-                print(f"  - EV4:               {ev_details.get('ev4Power', 0):>10.2f} W")
+    @staticmethod
+    def print_json(data: Dict[str, Any], indent: Optional[bool] = None):
+        """
+        Print a fetch_* result as JSON, e.g. ``client.print_json(client.fetch_power_data())``
 
-            print(f"\n{'=' * 50}\n")
-        else:
-            print(f"Failed to retrieve data: {data}")
+        Args:
+            data: JSON-serializable dictionary
+            indent: Pretty-print with 2-space indentation (default: only when stdout is a terminal,
+                otherwise one compact line for log/pipe consumers)
+        """
+        if indent is None:
+            indent = sys.stdout.isatty()
+        output = _dumps_indented(data) if indent else _dumps(data)
+        sys.stdout.write(output.decode() + "\n")
 
     def print_system_summary(self, system_sn: Optional[str] = None):
         """
@@ -331,156 +703,134 @@ class AlphaESSClient(AlphaESSAPI):
         Args:
             system_sn: System Serial Number
         """
-        system_sn = self.parse_system_sn(system_sn)
-        data = self.get_system_summary(system_sn)
+        system_sn = self._system_sn(system_sn)
+        sys.stdout.write(self._format_system_summary(self.get_system_summary(system_sn), system_sn) + "\n")
 
+    def _format_system_summary(self, data: Dict[str, Any], system_sn: str) -> str:
+        """Format a getSumDataForCustomer response for display"""
+        lines: List[str] = []
         if data.get("code") == 200:
             summary = data.get("data", {})
 
-            print(f"\n{'=' * 50}")
-            print(f"System Summary for: {system_sn}")
-            print(f"{'=' * 50}\n")
+            lines.append(f"\n{'=' * 50}")
+            lines.append(f"System Summary for: {system_sn}")
+            lines.append(f"{'=' * 50}\n")
 
-            print("TODAY'S DATA:")
-            print(f"  Generation:          {summary.get('epvtoday', 0):>10.2f} kWh")
-            print(f"  Load:                {summary.get('eload', 0):>10.2f} kWh")
-            print(f"  Feed-in:             {summary.get('eoutput', 0):>10.2f} kWh")
-            print(f"  Consumed:            {summary.get('einput', 0):>10.2f} kWh")
-            print(f"  Charged:             {summary.get('echarge', 0):>10.2f} kWh")
-            print(f"  Discharged:          {summary.get('edischarge', 0):>10.2f} kWh")
-            print(f"  Income:              {summary.get('todayIncome', 0):>10.2f} {summary.get('moneyType', '')}")
+            lines.extend(_render_sections(summary, SUMMARY_SECTIONS, currency=summary.get('moneyType', '')))
 
-            print(f"\nTOTAL:")
-            print(f"  Total Generation:    {summary.get('epvtotal', 0):>10.2f} kWh")
-            print(f"  Total Profit:        {summary.get('totalIncome', 0):>10.2f} {summary.get('moneyType', '')}")
-
-            print(f"\nEFFICIENCY:")
-            print(f"  Self-consumption:    {summary.get('eselfConsumption', 0):>10.2f} %")
-            print(f"  Self-sufficiency:    {summary.get('eselfSufficiency', 0):>10.2f} %")
-
-            print(f"\nENVIRONMENTAL IMPACT:")
-            print(f"  Trees Planted:       {summary.get('treeNum', 0):>10.2f}")
-            print(f"  CO2 Reduction:       {summary.get('carbonNum', 0):>10.2f} kg")
-
-            print(f"\n{'=' * 50}\n")
+            lines.append(f"\n{'=' * 50}\n")
         else:
-            print(f"Failed to retrieve data: {data}")
+            lines.append(f"Failed to retrieve data: {data}")
+
+        return "\n".join(lines)
 
     def print_system_list(self):
         """
         Retrieve and print list of all systems
         """
-        data = self.get_system_list()
+        sys.stdout.write(self._format_system_list(self.get_system_list()) + "\n")
 
+    def _format_system_list(self, data: Dict[str, Any]) -> str:
+        """Format a getEssList response for display"""
+        lines: List[str] = []
         if data.get("code") == 200:
             systems = data.get("data", [])
 
-            print(f"\n{'=' * 50}")
-            print(f"System List ({len(systems)} system(s) found)")
-            print(f"{'=' * 50}\n")
+            lines.append(f"\n{'=' * 50}")
+            lines.append(f"System List ({len(systems)} system(s) found)")
+            lines.append(f"{'=' * 50}\n")
 
             for idx, system in enumerate(systems, 1):
-                print(f"System {idx}:")
-                print(f"  Serial Number:       {system.get('sysSn', 'N/A')}")
-                print(f"  EMS Status:          {system.get('emsStatus', 'N/A')}")
-                print(f"  Inverter Model:      {system.get('minv', 'N/A')}")
-                print(f"  Inverter Power:      {system.get('poinv', 0):>10.2f} kW")
-                print(f"  PV Nominal Power:    {system.get('popv', 0):>10.2f} kW")
-                print(f"  Battery Model:       {system.get('mbat', 'N/A')}")
-                print(f"  Battery Capacity:    {system.get('cobat', 0):>10.2f} kWh")
-                print(f"  Remaining Capacity:  {system.get('surplusCobat', 0):>10.2f} kWh")
-                print(f"  Available %:         {system.get('usCapacity', 0):>10.2f} %")
-                print()
-
-            print(f"{'=' * 50}\n")
+                lines.append(f"System {idx}:")
+                lines.extend(_render(system, SYSTEM_SCHEMA))
+                lines.append("")
+
+            lines.append(f"{'=' * 50}\n")
         else:
-            print(f"Failed to retrieve data: {data}")
+            lines.append(f"Failed to retrieve data: {data}")
+
+        return "\n".join(lines)
 
-    def print_one_day_energy(self, query_date: str, system_sn: Optional[str] = None):
+    def print_one_day_energy(self, query_date: Union[str, date], system_sn: Optional[str] = None):
         """
         Retrieve and print energy data for a specific day
 
         Args:
             system_sn: System Serial Number
-            query_date: Date in format yyyy-MM-dd (e.g., "2024-01-15")
+            query_date: Date, or a string in format yyyy-MM-dd (e.g., "2024-01-15")
         """
-        system_sn = self.parse_system_sn(system_sn)
-        data = self.get_one_day_energy(system_sn, query_date)
+        system_sn = self._system_sn(system_sn)
+        query_date = _query_date_str(query_date)
+        data = self.get_one_day_energy(query_date, system_sn)
+        sys.stdout.write(self._format_one_day_energy(data, query_date, system_sn) + "\n")
 
+    def _format_one_day_energy(self, data: Dict[str, Any], query_date: str, system_sn: str) -> str:
+        """Format a getOneDateEnergyBySn response for display"""
+        lines: List[str] = []
         if data.get("code") == 200:
             energy = data.get("data", {})
 
-            print(f"\n{'=' * 50}")
-            print(f"Energy Data for {query_date}")
-            print(f"System: {system_sn}")
-            print(f"{'=' * 50}\n")
-
-            print("GENERATION:")
-            print(f"  PV Generation:       {energy.get('epv', 0):>10.2f} kWh")
-
-            print("\nBATTERY:")
-            print(f"  Total Charged:       {energy.get('eCharge', 0):>10.2f} kWh")
-            print(f"  Total Discharged:    {energy.get('eDischarge', 0):>10.2f} kWh")
-            print(f"  Grid Charged:        {energy.get('eGridCharge', 0):>10.2f} kWh")
-
-            print("\nGRID:")
-            print(f"  Grid Consumption:    {energy.get('eInput', 0):>10.2f} kWh")
-            print(f"  Feed-in:             {energy.get('eOutput', 0):>10.2f} kWh")
+            lines.append(f"\n{'=' * 50}")
+            lines.append(f"Energy Data for {query_date}")
+            lines.append(f"System: {system_sn}")
+            lines.append(f"{'=' * 50}\n")
 
-            print("\nEV CHARGING:")
-            print(f"  Charging Pile:       {energy.get('eChargingPile', 0):>10.2f} kWh")
+            lines.extend(_render_sections(energy, ENERGY_SECTIONS))
 
-            print(f"\n{'=' * 50}\n")
+            lines.append(f"\n{'=' * 50}\n")
         else:
-            print(f"Failed to retrieve data: {data}")
+            lines.append(f"Failed to retrieve data: {data}")
 
-    def print_one_day_power(self, query_date: str, system_sn: Optional[str] = None, max_records: int = 10):
+        return "\n".join(lines)
+
+    def print_one_day_power(self, query_date: Union[str, date], system_sn: Optional[str] = None, max_records: int = 10):
         """
         Retrieve and print power data timeline for a specific day
 
         Args:
             system_sn: System Serial Number
-            query_date: Date in format yyyy-MM-dd (e.g., "2024-01-15")
+            query_date: Date, or a string in format yyyy-MM-dd (e.g., "2024-01-15")
             max_records: Maximum number of records to display (default: 10, use None for all)
         """
-        system_sn = self.parse_system_sn(system_sn)
-        data = self.get_one_day_power(system_sn, query_date)
+        system_sn = self._system_sn(system_sn)
+        query_date = _query_date_str(query_date)
+        data = self.get_one_day_power(query_date, system_sn)
+        sys.stdout.write(self._format_one_day_power(data, query_date, system_sn, max_records) + "\n")
 
+    def _format_one_day_power(self, data: Dict[str, Any], query_date: str, system_sn: str,
+                             max_records: Optional[int] = 10) -> str:
+        """Format a getOneDayPowerBySn response for display"""
+        lines: List[str] = []
         if data.get("code") == 200:
             power_data = data.get("data", [])
 
-            print(f"\n{'=' * 50}")
-            print(f"Power Timeline for {query_date}")
-            print(f"System: {system_sn}")
-            print(f"Total Records: {len(power_data)}")
-            print(f"{'=' * 50}\n")
+            lines.append(f"\n{'=' * 50}")
+            lines.append(f"Power Timeline for {query_date}")
+            lines.append(f"System: {system_sn}")
+            lines.append(f"Total Records: {len(power_data)}")
+            lines.append(f"{'=' * 50}\n")
 
             if not power_data:
-                print("No data available for this date.")
-                print(f"\n{'=' * 50}\n")
-                return
-
-            # Display records
-            display_count = len(power_data) if max_records is None else min(max_records, len(power_data))
-
-            for idx, record in enumerate(power_data[:display_count], 1):
-                upload_time = record.get('uploadTime', 'N/A')
-                print(f"Record {idx} - {upload_time}")
-                print(f"  PV Power:            {record.get('ppv', 0):>10.2f} W")
-                print(f"  Battery Power:       {record.get('cobat', 0):>10.2f} W")
-                print(f"  Load:                {record.get('load', 0):>10.2f} W")
-                print(f"  Grid Charge:         {record.get('gridCharge', 0):>10.2f} W")
-                print(f"  Feed-in:             {record.get('feedIn', 0):>10.2f} W")
-                print(f"  Charging Pile:       {record.get('pChargingPile', 0):>10.2f} W")
-                print()
-
-            if max_records and len(power_data) > max_records:
-                print(f"... and {len(power_data) - max_records} more records")
-                print("(Use max_records=None to see all records)")
-
-            print(f"{'=' * 50}\n")
+                lines.append("No data available for this date.")
+                lines.append(f"\n{'=' * 50}\n")
+            else:
+                # Display records (islice avoids copying the list; max_records=None shows all)
+                for idx, record in enumerate(islice(power_data, max_records), 1):
+                    # Missing power fields display as 0, a missing timestamp as N/A
+                    fields = defaultdict(float, record)
+                    fields.setdefault("uploadTime", "N/A")
+                    fields["_idx"] = idx
+                    lines.append(_ONE_DAY_POWER_RECORD.format_map(fields))
+
+                if max_records and len(power_data) > max_records:
+                    lines.append(f"... and {len(power_data) - max_records} more records")
+                    lines.append("(Use max_records=None to see all records)")
+
+                lines.append(f"{'=' * 50}\n")
         else:
-            print(f"Failed to retrieve data: {data}")
+            lines.append(f"Failed to retrieve data: {data}")
+
+        return "\n".join(lines)
 
     def print_charge_config(self, system_sn: Optional[str] = None):
         """
@@ -489,30 +839,36 @@ class AlphaESSClient(AlphaESSAPI):
         Args:
             system_sn: System Serial Number
         """
-        system_sn = self.parse_system_sn(system_sn)
-        data = self.get_charge_config(system_sn)
+        system_sn = self._system_sn(system_sn)
+        sys.stdout.write(self._format_charge_config(self.get_charge_config(system_sn), system_sn) + "\n")
 
+    def _format_charge_config(self, data: Dict[str, Any], system_sn: str) -> str:
+        """Format a getChargeConfigInfo response for display"""
+        lines: List[str] = []
         if data.get("code") == 200:
             config = data.get("data", {})
 
-            print(f"\n{'=' * 50}")
-            print(f"Charging Configuration")
-            print(f"System: {system_sn}")
-            print(f"{'=' * 50}\n")
+            lines.append(f"\n{'=' * 50}")
+            lines.append(f"Charging Configuration")
+            lines.append(f"System: {system_sn}")
+            lines.append(f"{'=' * 50}\n")
 
             grid_charge_enabled = config.get('gridCharge', 0)
             grid_charge_status = "Enabled" if grid_charge_enabled == 1 else "Disabled"
 
-            print(f"Grid Charging:         {grid_charge_status}")
-            print(f"Charging Stops at:     {config.get('batHighCap', 0):>10.2f} % SOC")
+            lines.append(f"Grid Charging:         {grid_charge_status}")
+            lines.extend(_render(config, CHARGE_SCHEMA))
 
-            print("\nCHARGING PERIODS:")
-            print(f"  Period 1:            {config.get('timeChaf1', 'N/A')} - {config.get('timeChae1', 'N/A')}")
-            print(f"  Period 2:            {config.get('timeChaf2', 'N/A')} - {config.get('timeChae2', 'N/A')}")
+            lines.append("\nCHARGING PERIODS:")
+            periods = _project(config, CHARGE_PERIODS_SCHEMA)
+            lines.append(f"  Period 1:            {periods['period_1_start']} - {periods['period_1_end']}")
+            lines.append(f"  Period 2:            {periods['period_2_start']} - {periods['period_2_end']}")
 
-            print(f"\n{'=' * 50}\n")
+            lines.append(f"\n{'=' * 50}\n")
         else:
-            print(f"Failed to retrieve data: {data}")
+            lines.append(f"Failed to retrieve data: {data}")
+
+        return "\n".join(lines)
 
     def fetch_power_data(self, system_sn: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -524,7 +880,7 @@ class AlphaESSClient(AlphaESSAPI):
         Returns:
             Dictionary with formatted power data or error information
         """
-        system_sn = self.parse_system_sn(system_sn)
+        system_sn = self._system_sn(system_sn)
         data = self.get_last_power_data(system_sn)
 
         if data.get("code") != 200:
@@ -532,52 +888,14 @@ class AlphaESSClient(AlphaESSAPI):
 
         power_data = data.get("data", {})
 
-        result = {
-            "pv_total_power_w": power_data.get('ppv', 0),
-            "battery_power_w": power_data.get('pbat', 0),
-            "battery_soc_percent": power_data.get('soc', 0),
-            "load_power_w": power_data.get('pload', 0),
-            "grid_power_w": power_data.get('pgrid', 0),
-            "ev_charger_total_w": power_data.get('pev', 0),
-        }
-
-        # Add grid status
-        pgrid = power_data.get('pgrid', 0)
-        if pgrid > 0:
-            result["grid_status"] = "importing"
-        elif pgrid < 0:
-            result["grid_status"] = "exporting"
-        else:
-            result["grid_status"] = "zero"
-
-        # Add PV details if available
-        pv_details = power_data.get('ppvDetailData', {})
-        if pv_details:
-            result["pv_details"] = {
-                "pv1_w": pv_details.get('ppv1', 0),
-                "pv2_w": pv_details.get('ppv2', 0),
-                "pv3_w": pv_details.get('ppv3', 0),
-                "pv4_w": pv_details.get('ppv4', 0),
-            }
-
-        # Add grid details if available
-        grid_details = power_data.get('pgridDetailData', {})
-        if grid_details:
-            result["grid_details"] = {
-                "l1_w": grid_details.get('pmeterL1', 0),
-                "l2_w": grid_details.get('pmeterL2', 0),
-                "l3_w": grid_details.get('pmeterL3', 0),
-            }
+        result = _project(power_data, POWER_SCHEMA)
+        result["grid_status"] = _grid_status(result["grid_power_w"])
 
-        # Add EV details if available
-        ev_details = power_data.get('pevDetailData', {})
-        if ev_details:
-            result["ev_details"] = {
-                "ev1_w": ev_details.get('ev1Power', 0),
-                "ev2_w": ev_details.get('ev2Power', 0),
-                "ev3_w": ev_details.get('ev3Power', 0),
-                "ev4_w": ev_details.get('ev4Power', 0),
-            }
+        # Add PV / grid / EV details if available
+        for _, detail_key, detail_out, detail_schema in POWER_SECTIONS:
+            details = detail_key and power_data.get(detail_key)
+            if details:
+                result[detail_out] = _project(details, detail_schema)
 
         return result
 
@@ -591,7 +909,7 @@ class AlphaESSClient(AlphaESSAPI):
         Returns:
             Dictionary with formatted system summary or error information
         """
-        system_sn = self.parse_system_sn(system_sn)
+        system_sn = self._system_sn(system_sn)
         data = self.get_system_summary(system_sn)
 
         if data.get("code") != 200:
@@ -599,31 +917,7 @@ class AlphaESSClient(AlphaESSAPI):
 
         summary = data.get("data", {})
 
-        result = {
-            "today_data": {
-                "generation_kwh": summary.get('epvtoday', 0),
-                "load_kwh": summary.get('eload', 0),
-                "feed_in_kwh": summary.get('eoutput', 0),
-                "consumed_kwh": summary.get('einput', 0),
-                "charged_kwh": summary.get('echarge', 0),
-                "discharged_kwh": summary.get('edischarge', 0),
-                "income": summary.get('todayIncome', 0),
-                "income_currency": summary.get('moneyType', ''),
-            },
-            "total": {
-                "total_generation_kwh": summary.get('epvtotal', 0),
-                "total_profit": summary.get('totalIncome', 0),
-                "total_profit_currency": summary.get('moneyType', ''),
-            },
-            "efficiency": {
-                "self_consumption_percent": summary.get('eselfConsumption', 0),
-                "self_sufficiency_percent": summary.get('eselfSufficiency', 0),
-            },
-            "environmental_impact": {
-                "trees_planted": summary.get('treeNum', 0),
-                "co2_reduction_kg": summary.get('carbonNum', 0),
-            },
-        }
+        result = {name: _project(summary, schema) for name, _, schema in SUMMARY_SECTIONS}
 
         return result
 
@@ -643,36 +937,24 @@ class AlphaESSClient(AlphaESSAPI):
 
         result = {
             "system_count": len(systems),
-            "systems": []
+            "systems": [_project(system, SYSTEM_SCHEMA) for system in systems],
         }
 
-        for system in systems:
-            result["systems"].append({
-                "serial_number": system.get('sysSn', 'N/A'),
-                "ems_status": system.get('emsStatus', 'N/A'),
-                "inverter_model": system.get('minv', 'N/A'),
-                "inverter_power_kw": system.get('poinv', 0),
-                "pv_nominal_power_kw": system.get('popv', 0),
-                "battery_model": system.get('mbat', 'N/A'),
-                "battery_capacity_kwh": system.get('cobat', 0),
-                "remaining_capacity_kwh": system.get('surplusCobat', 0),
-                "available_percent": system.get('usCapacity', 0),
-            })
-
         return result
 
-    def fetch_one_day_energy(self, query_date: str, system_sn: Optional[str] = None) -> Dict[str, Any]:
+    def fetch_one_day_energy(self, query_date: Union[str, date], system_sn: Optional[str] = None) -> Dict[str, Any]:
         """
         Retrieve energy data for a specific day in JSON-serializable format
 
         Args:
-            query_date: Date in format yyyy-MM-dd (e.g., "2024-01-15")
+            query_date: Date, or a string in format yyyy-MM-dd (e.g., "2024-01-15")
             system_sn: System Serial Number
 
         Returns:
             Dictionary with formatted energy data or error information
         """
-        system_sn = self.parse_system_sn(system_sn)
+        system_sn = self._system_sn(system_sn)
+        query_date = _query_date_str(query_date)
         data = self.get_one_day_energy(query_date, system_sn)
 
         if data.get("code") != 200:
@@ -680,41 +962,26 @@ class AlphaESSClient(AlphaESSAPI):
 
         energy = data.get("data", {})
 
-        result = {
-            "query_date": query_date,
-            "generation": {
-                "pv_generation_kwh": energy.get('epv', 0),
-            },
-            "battery": {
-                "total_charged_kwh": energy.get('eCharge', 0),
-                "total_discharged_kwh": energy.get('eDischarge', 0),
-                "grid_charged_kwh": energy.get('eGridCharge', 0),
-            },
-            "grid": {
-                "grid_consumption_kwh": energy.get('eInput', 0),
-                "feed_in_kwh": energy.get('eOutput', 0),
-            },
-            "ev_charging": {
-                "charging_pile_kwh": energy.get('eChargingPile', 0),
-            },
-        }
+        result = {"query_date": query_date}
+        result.update((name, _project(energy, schema)) for name, _, schema in ENERGY_SECTIONS)
 
         return result
 
-    def fetch_one_day_power(self, query_date: str, system_sn: Optional[str] = None,
+    def fetch_one_day_power(self, query_date: Union[str, date], system_sn: Optional[str] = None,
                             max_records: Optional[int] = None) -> Dict[str, Any]:
         """
         Retrieve power data timeline for a specific day in JSON-serializable format
 
         Args:
-            query_date: Date in format yyyy-MM-dd (e.g., "2024-01-15")
+            query_date: Date, or a string in format yyyy-MM-dd (e.g., "2024-01-15")
             system_sn: System Serial Number
             max_records: Maximum number of records to return (default: None for all records)
 
         Returns:
             Dictionary with formatted power timeline data or error information
         """
-        system_sn = self.parse_system_sn(system_sn)
+        system_sn = self._system_sn(system_sn)
+        query_date = _query_date_str(query_date)
         data = self.get_one_day_power(query_date, system_sn)
 
         if data.get("code") != 200:
@@ -722,30 +989,136 @@ class AlphaESSClient(AlphaESSAPI):
 
         power_data = data.get("data", [])
 
-        # Limit records if max_records is specified
-        if max_records is not None:
-            power_data = power_data[:max_records]
+        # Only the returned records are projected (islice with max_records=None takes all)
+        records = [_project(record, POWER_RECORD_SCHEMA) for record in islice(power_data, max_records)]
 
         result = {
             "query_date": query_date,
-            "total_records": len(data.get("data", [])),
-            "returned_records": len(power_data),
-            "records": []
+            "total_records": len(power_data),
+            "returned_records": len(records),
+            "records": records,
         }
 
-        for record in power_data:
-            result["records"].append({
-                "upload_time": record.get('uploadTime', 'N/A'),
-                "pv_power_w": record.get('ppv', 0),
-                "battery_power_w": record.get('cobat', 0),
-                "load_w": record.get('load', 0),
-                "grid_charge_w": record.get('gridCharge', 0),
-                "feed_in_w": record.get('feedIn', 0),
-                "charging_pile_w": record.get('pChargingPile', 0),
-            })
-
         return result
 
+    def fetch_one_day_power_json(self, query_date: Union[str, date], system_sn: Optional[str] = None,
+                                 max_records: Optional[int] = None) -> bytes:
+        """
+        Retrieve power data timeline for a specific day as serialized JSON, ready to write to a socket or file
+
+        Args:
+            query_date: Date, or a string in format yyyy-MM-dd (e.g., "2024-01-15")
+            system_sn: System Serial Number
+            max_records: Maximum number of records to return (default: None for all records)
+
+        Returns:
+            UTF-8 JSON bytes of the fetch_one_day_power result
+        """
+        return _dumps(self.fetch_one_day_power(query_date, system_sn, max_records))
+
+    def iter_one_day_power(self, query_date: Union[str, date],
+                           system_sn: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the power timeline for a specific day, projecting each record only when consumed
+
+        Records use the same keys as fetch_one_day_power, so a consumer that stops early
+        (e.g. ``islice(client.iter_one_day_power(day), 10)``) never builds the rest.
+
+        Args:
+            query_date: Date, or a string in format yyyy-MM-dd (e.g., "2024-01-15")
+            system_sn: System Serial Number
+
+        Returns:
+            Iterator of record dictionaries
+
+        Raises:
+            RuntimeError: If the data could not be retrieved
+        """
+        system_sn = self._system_sn(system_sn)
+        data = self.get_one_day_power(query_date, system_sn)
+
+        if data.get("code") != 200:
+            raise RuntimeError(f"Failed to retrieve data: {data.get('msg', data.get('error'))}")
+
+        return (_project(record, POWER_RECORD_SCHEMA) for record in data.get("data") or [])
+
+    @staticmethod
+    def _one_day_power_frame(records: List[Dict[str, Any]], value_dtype: str = "float32"):
+        """Build the typed DataFrame for a list of getOneDayPowerBySn records"""
+        try:
+            import pandas as pd
+        except ImportError as e:
+            raise ImportError("pandas is required for DataFrame output. Install with: pip install pandas") from e
+
+        df = pd.DataFrame.from_records(records, columns=ONE_DAY_POWER_COLUMNS)
+        df["uploadTime"] = pd.to_datetime(df["uploadTime"])
+        value_columns = ONE_DAY_POWER_COLUMNS[1:]
+        df[value_columns] = df[value_columns].astype(value_dtype)
+        return df
+
+    def get_one_day_power_df(self, query_date: Union[str, date], system_sn: Optional[str] = None):
+        """
+        Retrieve power data timeline for a specific day as a pandas DataFrame
+
+        Each field becomes one contiguous column (uploadTime as datetime, power values
+        as float32), so aggregations and plotting run vectorised instead of per record.
+        Requires pandas.
+
+        Args:
+            query_date: Date, or a string in format yyyy-MM-dd (e.g., "2024-01-15")
+            system_sn: System Serial Number
+
+        Returns:
+            DataFrame with one row per record and ONE_DAY_POWER_COLUMNS as columns
+
+        Raises:
+            ImportError: If pandas is not installed
+            RuntimeError: If the data could not be retrieved
+        """
+        system_sn = self._system_sn(system_sn)
+        data = self.get_one_day_power(query_date, system_sn)
+
+        if data.get("code") != 200:
+            raise RuntimeError(f"Failed to retrieve data: {data.get('msg', data.get('error'))}")
+
+        return self._one_day_power_frame(data.get("data") or [])
+
+    def fetch_one_day_power_stats(self, query_date: Union[str, date], system_sn: Optional[str] = None,
+                                  columns: Tuple[str, ...] = ("ppv", "load")) -> Dict[str, Any]:
+        """
+        Retrieve daily mean / max / sum of power timeline fields in JSON-serializable format
+
+        The aggregation runs over DataFrame columns rather than per record, which matters
+        for per-minute timelines (1440 records a day). Requires pandas.
+
+        Args:
+            query_date: Date, or a string in format yyyy-MM-dd (e.g., "2024-01-15")
+            system_sn: System Serial Number
+            columns: API fields to aggregate (default: PV power and load)
+
+        Returns:
+            Dictionary with the statistics keyed by the fetch_one_day_power record names,
+            or error information
+        """
+        system_sn = self._system_sn(system_sn)
+        query_date = _query_date_str(query_date)
+        data = self.get_one_day_power(query_date, system_sn)
+
+        if data.get("code") != 200:
+            return {"error": data.get("msg", "Failed to retrieve data"), "code": data.get("code")}
+
+        # float64 so the JSON carries the API's values, not float32 approximations of them
+        df = self._one_day_power_frame(data.get("data") or [], value_dtype="float64")
+        stats = df[list(columns)].agg(["mean", "max", "sum"]).rename(columns=_POWER_COL_MAP)
+
+        return {
+            "query_date": query_date,
+            "total_records": len(df),
+            # mean / max of an empty day are NaN, which is not valid JSON
+            "stats": {name: {k: None if math.isnan(v) else float(v) for k, v in values.items()}
+                      for name, values in stats.to_dict().items()},
+        }
+
     def fetch_charge_config(self, system_sn: Optional[str] = None) -> Dict[str, Any]:
         """
         Retrieve charging configuration in JSON-serializable format
@@ -756,7 +1129,7 @@ class AlphaESSClient(AlphaESSAPI):
         Returns:
             Dictionary with formatted charging configuration or error information
         """
-        system_sn = self.parse_system_sn(system_sn)
+        system_sn = self._system_sn(system_sn)
         data = self.get_charge_config(system_sn)
 
         if data.get("code") != 200:
@@ -766,19 +1139,59 @@ class AlphaESSClient(AlphaESSAPI):
 
         result = {
             "grid_charging_enabled": config.get('gridCharge', 0) == 1,
-            "charging_stops_at_soc_percent": config.get('batHighCap', 0),
-            "charging_periods": {
-                "period_1_start": config.get('timeChaf1', 'N/A'),
-                "period_1_end": config.get('timeChae1', 'N/A'),
-                "period_2_start": config.get('timeChaf2', 'N/A'),
-                "period_2_end": config.get('timeChae2', 'N/A'),
-            },
+            **_project(config, CHARGE_SCHEMA),
+            "charging_periods": _project(config, CHARGE_PERIODS_SCHEMA),
         }
 
         return result
 
+    def fetch_all(self, query_date: Union[str, date], system_sn: Optional[str] = None,
+                  max_records: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Retrieve every fetch_* view at once, issuing the underlying requests concurrently
+
+        Args:
+            query_date: Date, or a yyyy-MM-dd string, for the one-day energy and power views
+            system_sn: System Serial Number
+            max_records: Maximum number of power timeline records to return (default: None for all records)
+
+        Returns:
+            Dictionary keyed by view name, each value as returned by the matching fetch_* method
+        """
+        system_sn = self._system_sn(system_sn)
+        query_date = _query_date_str(query_date)
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            futures = {
+                "system_list": pool.submit(self.fetch_system_list),
+                "system_summary": pool.submit(self.fetch_system_summary, system_sn),
+                "power_data": pool.submit(self.fetch_power_data, system_sn),
+                "charge_config": pool.submit(self.fetch_charge_config, system_sn),
+                "one_day_energy": pool.submit(self.fetch_one_day_energy, query_date, system_sn),
+                "one_day_power": pool.submit(self.fetch_one_day_power, query_date, system_sn, max_records),
+            }
+            return {name: future.result() for name, future in futures.items()}
+
+
+_default_client: Optional[AlphaESSClient] = None
+_default_client_lock = threading.Lock()
 
-def demo(app_id: str, app_secret: str, system_sn: str, query_date: str = None):
+
+def get_default_client() -> AlphaESSClient:
+    """
+    Return a process-wide AlphaESSClient configured from the ALPHAESS_* environment variables
+
+    Reusing one instance keeps its pooled session, response cache and in-flight requests shared
+    across callers. Instantiate AlphaESSClient directly to use other credentials.
+    """
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = AlphaESSClient()
+    return _default_client
+
+
+def demo(app_id: str, app_secret: str, system_sn: str, query_date: Optional[Union[str, date]] = None):
     """
     Run a demonstration of all AlphaESS API endpoints
 
@@ -786,61 +1199,55 @@ def demo(app_id: str, app_secret: str, system_sn: str, query_date: str = None):
         app_id: AlphaESS App ID
         app_secret: AlphaESS App Secret
         system_sn: System Serial Number
-        query_date: Optional date in YYYY-MM-DD format (defaults to today)
+        query_date: Optional date, or a string in YYYY-MM-DD format (defaults to today)
     """
-    from datetime import datetime
+    # Default to today if no date provided; format to the API string once for every call below
+    query_date = _query_date_str(query_date if query_date is not None else date.today())
 
-    # Default to today if no date provided
-    if query_date is None:
-        query_date = datetime.now().strftime("%Y-%m-%d")
+    with AlphaESSClient(app_id, app_secret) as client:
+        # The six endpoints are independent, so fetch them concurrently and print in order afterwards
+        responses = client.get_all(query_date, system_sn)
 
-    # Create client instance
-    client = AlphaESSClient(app_id, app_secret)
+        # Format the whole report first and write it in one go
+        report = [
+            "\n" + "=" * 60,
+            "AlphaESS API Client - Demo",
+            f"Query Date: {query_date}",
+            "=" * 60,
 
-    print("\n" + "=" * 60)
-    print("AlphaESS API Client - Demo")
-    print(f"Query Date: {query_date}")
-    print("=" * 60)
+            # Example 1: Get list of all systems
+            "\n1. Getting System List...",
+            client._format_system_list(responses["system_list"]),
 
-    # Example 1: Get list of all systems
-    print("\n1. Getting System List...")
-    client.print_system_list()
+            # Example 2: Get system summary (daily/total stats)
+            "\n2. Getting System Summary...",
+            client._format_system_summary(responses["system_summary"], system_sn),
 
-    # Example 2: Get system summary (daily/total stats)
-    print("\n2. Getting System Summary...")
-    client.print_system_summary(system_sn)
+            # Example 3: Get real-time power data
+            "\n3. Getting Real-time Power Data...",
+            client._format_power_data(responses["power_data"], system_sn),
 
-    # Example 3: Get real-time power data
-    print("\n3. Getting Real-time Power Data...")
-    client.print_power_data(system_sn)
+            # Example 4: Get charging configuration
+            "\n4. Getting Charging Configuration...",
+            client._format_charge_config(responses["charge_config"], system_sn),
 
-    # Example 4: Get charging configuration
-    print("\n4. Getting Charging Configuration...")
-    client.print_charge_config(system_sn)
+            # Example 5: Get energy data for a specific day
+            "\n5. Getting Energy Data for a Specific Day...",
+            client._format_one_day_energy(responses["one_day_energy"], query_date, system_sn),
 
-    # Example 5: Get energy data for a specific day
-    print("\n5. Getting Energy Data for a Specific Day...")
-    client.print_one_day_energy(system_sn, query_date)
+            # Example 6: Get power timeline for a specific day (showing first 5 records)
+            "\n6. Getting Power Timeline for a Specific Day...",
+            client._format_one_day_power(responses["one_day_power"], query_date, system_sn, max_records=5),
 
-    # Example 6: Get power timeline for a specific day (showing first 5 records)
-    print("\n6. Getting Power Timeline for a Specific Day...")
-    client.print_one_day_power(system_sn, query_date, max_records=5)
+            "\n" + "=" * 60,
+            "Demo Complete!",
+            "=" * 60 + "\n",
+        ]
 
-    print("\n" + "=" * 60)
-    print("Demo Complete!")
-    print("=" * 60 + "\n")
+    sys.stdout.write("\n".join(report) + "\n")
 
 
-# Example usage
-if __name__ == "__main__":
-    import argparse
-    from datetime import datetime
-
-    # Set up argument parser
-    parser = argparse.ArgumentParser(
-        description="AlphaESS API Client - Retrieve solar battery system data",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
+_CLI_EPILOG = """
             Examples:
               # Query today's data
               python alphaess_api.py --app-id alphaef7900ee81dbbce9 --app-secret c2d2ef6c047c49678e2c332fb2d74c3c --system-sn AL2104XXXXXXXX
@@ -854,6 +1261,16 @@ if __name__ == "__main__":
               export ALPHAESS_SYSTEM_SN=AL2104XXXXXXXX
               python alphaess_api.py
         """
+
+
+def _build_parser():
+    """Build the command-line parser for the demo"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="AlphaESS API Client - Retrieve solar battery system data",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=_CLI_EPILOG,
     )
 
     parser.add_argument(
@@ -874,28 +1291,67 @@ if __name__ == "__main__":
         "--system-sn",
         type=str,
         required=False,
-        help="System Serial Number (or set ALPHAESS_SYSTEM_SN environment variable)"
+        help="System Serial Number (or set ALPHAESS_SYSTEM_SN / ALPHAESS_SN environment variable)"
     )
 
     parser.add_argument(
         "--date",
-        type=str,
+        type=date.fromisoformat,
         default=None,
         help="Query date in YYYY-MM-DD format (defaults to today)"
     )
 
-    args = parser.parse_args()
+    return parser
+
 
-    # Get credentials from args or environment variables
-    import os
+@dataclass(frozen=True)
+class AlphaESSCreds:
+    """Credentials and options for the command-line demo, resolved once"""
+    app_id: Optional[str] = None
+    app_secret: Optional[str] = None
+    system_sn: Optional[str] = None
+    query_date: Optional[date] = None
 
-    app_id = args.app_id or os.getenv("ALPHAESS_APP_ID")
-    app_secret = args.app_secret or os.getenv("ALPHAESS_APP_SECRET")
-    system_sn = args.system_sn or os.getenv("ALPHAESS_SYSTEM_SN")
+    @property
+    def complete(self) -> bool:
+        return bool(self.app_id and self.app_secret and self.system_sn)
+
+    @classmethod
+    def from_env_and_args(cls, argv: Optional[List[str]] = None) -> "AlphaESSCreds":
+        """
+        Resolve from command-line arguments, falling back to environment variables
+
+        The argument parser is only built when arguments were given.
+
+        Args:
+            argv: Command-line arguments (default: sys.argv[1:])
+        """
+        argv = sys.argv[1:] if argv is None else argv
+        env = os.environ
+        from_env = cls(
+            app_id=env.get("ALPHAESS_APP_ID"),
+            app_secret=env.get("ALPHAESS_APP_SECRET"),
+            system_sn=env.get("ALPHAESS_SYSTEM_SN") or env.get("ALPHAESS_SN"),
+        )
+        if not argv:
+            return from_env
+
+        args = _build_parser().parse_args(argv)
+        return cls(
+            app_id=args.app_id or from_env.app_id,
+            app_secret=args.app_secret or from_env.app_secret,
+            system_sn=args.system_sn or from_env.system_sn,
+            query_date=args.date,
+        )
+
+
+# Example usage
+if __name__ == "__main__":
+    creds = AlphaESSCreds.from_env_and_args()
 
     # Validate required parameters
-    if not app_id or not app_secret or not system_sn:
-        parser.print_help()
+    if not creds.complete:
+        _build_parser().print_help()
         print("\n" + "=" * 60)
         print("ERROR: Missing required credentials!")
         print("=" * 60)
@@ -903,9 +1359,7 @@ if __name__ == "__main__":
         print("  1. Command-line arguments (--app-id, --app-secret, --system-sn)")
         print("  2. Environment variables (ALPHAESS_APP_ID, ALPHAESS_APP_SECRET, ALPHAESS_SYSTEM_SN)")
         print("\n")
-        import sys
-
         sys.exit(1)
 
     # Run the demo
-    demo(app_id, app_secret, system_sn, args.date)
+    demo(creds.app_id, creds.app_secret, creds.system_sn, creds.query_date)
@@ -24,18 +24,29 @@ Usage:
     mqtt.connect(blocking=False)
 """
 
+import asyncio
+import base64
 import io
+import json
 import logging
 import os
 import platform
 import sys
 import select
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Callable, Dict, List, Optional
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
 from zoneinfo import ZoneInfo
 
+import requests
+
+from garage_worker._jsonio import write_atomic
+
 # Re-export from bambu-lab-cloud-api package
 try:
     from bambulab import BambuAuthenticator, BambuClient, MQTTClient
@@ -46,19 +57,86 @@ except ImportError as e:
 
 
 DEFAULT_TIMEZONE = os.getenv("BAMBULAB_TIMEZONE", "Australia/Melbourne")
+_TZ = ZoneInfo(DEFAULT_TIMEZONE)
+
+# Tokens are persisted here so restarts skip the login (and 2FA) round-trip
+TOKEN_CACHE_PATH = Path(os.getenv("BAMBU_TOKEN_CACHE", Path.home() / ".cache" / "garage_worker" / "bambu_token.json"))
+TOKEN_CACHE_TTL = 6 * 24 * 3600  # seconds, conservatively below the token lifetime
+_token_cache_lock = threading.Lock()
+# Share of a token's lifetime (iat to exp) after which it is refreshed ahead of expiry
+TOKEN_REFRESH_FRACTION = 0.8
+TOKEN_REFRESH_MARGIN = 3600  # seconds before exp to refresh tokens without an iat claim
+TOKEN_REFRESH_MIN_DELAY = 60  # seconds, floor for the proactive refresh timer, never beyond exp
 
 logger = logging.getLogger(__name__)
 
 
+# sys.stdout is process-wide: swaps from different threads must not interleave their restores
+_stdout_lock = threading.RLock()
+
+
 @contextmanager
 def suppress_stdout():
     """Context manager to suppress stdout (for silencing library print statements)"""
-    old_stdout = sys.stdout
-    sys.stdout = io.StringIO()
+    with _stdout_lock:
+        old_stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        try:
+            yield
+        finally:
+            sys.stdout = old_stdout
+
+
+def _token_claims(token: Optional[str]) -> Dict[str, Any]:
+    """Read the claims of a JWT token without verifying it, empty if not a JWT"""
     try:
-        yield
-    finally:
-        sys.stdout = old_stdout
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except (AttributeError, IndexError, TypeError, ValueError):
+        return {}
+    return claims if isinstance(claims, dict) else {}
+
+
+def _token_expiry(token: Optional[str]) -> Optional[float]:
+    """The ``exp`` claim of a JWT token, None if not a JWT or missing"""
+    try:
+        return float(_token_claims(token)["exp"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _refresh_deadline(token: Optional[str]) -> Optional[float]:
+    """Wall-clock time at which a token should be refreshed, None if its expiry is unknown"""
+    claims = _token_claims(token)
+    try:
+        exp = float(claims["exp"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    try:
+        lifetime = exp - float(claims["iat"])
+    except (KeyError, TypeError, ValueError):
+        lifetime = 0
+    margin = (1 - TOKEN_REFRESH_FRACTION) * lifetime if lifetime > 0 else TOKEN_REFRESH_MARGIN
+    return exp - margin
+
+
+def _is_auth_error(exc: Exception) -> bool:
+    """Whether a connect failure is an authentication problem worth a token refresh"""
+    response = getattr(exc, "response", None)
+    if isinstance(exc, requests.HTTPError) and response is not None:
+        return response.status_code in (401, 403)
+    status_code = getattr(exc, "status_code", None)
+    if isinstance(status_code, int):
+        return status_code in (401, 403)
+    # Untyped errors: fall back to scanning the message
+    error_msg = str(exc).lower()
+    return any(x in error_msg for x in ["401", "unauthorized", "token", "auth", "expired"])
+
+
+def _needs_verification(exc: Exception) -> bool:
+    """Whether a login failure is BambuLab asking for an email verification (2FA) code"""
+    error_msg = str(exc).lower()
+    return "verification" in error_msg or "code" in error_msg or "2fa" in error_msg
 
 
 def timed_input(prompt: str, timeout_sec: int = 300) -> str:
@@ -423,7 +501,7 @@ class PrinterState:
         to maintain a complete state across multiple updates.
         """
         if timestamp is None:
-            timestamp = datetime.now(ZoneInfo(DEFAULT_TIMEZONE)).isoformat()
+            timestamp = datetime.now(_TZ).isoformat()
 
         print_data = data.get("print", {})
 
@@ -774,16 +852,18 @@ class PrinterStateAccumulator:
         Returns:
             Complete PrinterState with all accumulated values
         """
-        timestamp = datetime.now(ZoneInfo(DEFAULT_TIMEZONE)).isoformat()
-        self._last_update = timestamp
+        self.merge(data)
+        return PrinterState.from_mqtt_data(self._state_data, self._last_update)
+
+    def merge(self, data: Dict[str, Any]) -> None:
+        """Merge new MQTT data into accumulated state without building a PrinterState"""
+        self._last_update = datetime.now(_TZ).isoformat()
         self._update_count += 1
 
         # Deep merge the print data
         if "print" in data:
             self._deep_merge(self._state_data["print"], data["print"])
 
-        return PrinterState.from_mqtt_data(self._state_data, timestamp)
-
     def _deep_merge(self, base: Dict, update: Dict) -> None:
         """Recursively merge update into base dict"""
         for key, value in update.items():
@@ -794,7 +874,7 @@ class PrinterStateAccumulator:
 
     def get_state(self) -> PrinterState:
         """Get current accumulated state without updating"""
-        timestamp = self._last_update or datetime.now(ZoneInfo(DEFAULT_TIMEZONE)).isoformat()
+        timestamp = self._last_update or datetime.now(_TZ).isoformat()
         return PrinterState.from_mqtt_data(self._state_data, timestamp)
 
     def reset(self) -> None:
@@ -820,9 +900,11 @@ class BambuPrinter:
     Combines authentication, client, and MQTT into a single interface.
 
     Features:
-    - Automatic token refresh when expired
+    - Automatic token refresh when expired, and ahead of expiry when the token carries a JWT exp claim
+    - Token persisted to disk (TOKEN_CACHE_PATH) so restarts skip login and 2FA
     - Suppresses stdout prints from underlying library (safe for Django/background)
     - Auto-reconnect on connection errors
+    - Bursts of MQTT deltas coalesced into a single on_update call (coalesce_ms)
 
     Usage:
         # For Django background runner (fully automated):
@@ -852,6 +934,8 @@ class BambuPrinter:
         on_update: Optional[Callable[[PrinterState], None]] = None,
         silent: bool = True,
         verification_timeout: int = 300,
+        token_cache: Optional[Union[str, Path]] = TOKEN_CACHE_PATH,
+        coalesce_ms: int = 200,
     ):
         """
         Initialize BambuPrinter.
@@ -861,9 +945,11 @@ class BambuPrinter:
             password: BambuLab account password (or BAMBU_PASSWORD env var)
             token: Pre-obtained token (optional, skips initial authentication)
             device_id: Specific device ID to monitor (optional, uses first device)
-            on_update: Callback function called on each MQTT update
+            on_update: Callback function called with the merged state after MQTT updates
             silent: If True, suppress stdout prints from library (default: True)
             verification_timeout: Seconds to wait for 2FA code input (default: 300)
+            token_cache: File to persist the token in across restarts (default: TOKEN_CACHE_PATH, None disables)
+            coalesce_ms: Window in which MQTT updates are merged into one on_update call (default: 200, 0 disables)
         """
         self.username = username or os.getenv("BAMBU_USERNAME")
         self.password = password or os.getenv("BAMBU_PASSWORD")
@@ -873,6 +959,13 @@ class BambuPrinter:
         self._on_update = on_update
         self._silent = silent
         self._verification_timeout = verification_timeout
+        self._token_cache = Path(token_cache) if token_cache is not None else None
+        self._token_exp = _token_expiry(self._token)
+        self._token_refresh_at = _refresh_deadline(self._token)
+        self._refresh_timer: Optional[threading.Timer] = None
+        self._coalesce_ms = coalesce_ms
+        self._flush_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
 
         self._client: Optional[BambuClient] = None
         self._mqtt: Optional[MQTTClient] = None
@@ -923,7 +1016,7 @@ class BambuPrinter:
                     password=self.password
                 )
 
-            self._token = token
+            self._set_token(token)
             print("Authentication successful!")
             print(f"Token: {token[:20]}...{token[-10:]}")
             print("=" * 60 + "\n")
@@ -931,10 +1024,8 @@ class BambuPrinter:
             return token
 
         except Exception as e:
-            error_msg = str(e).lower()
-
             # Check if it's a verification code request
-            if "verification" in error_msg or "code" in error_msg or "2fa" in error_msg:
+            if _needs_verification(e):
                 print("\n" + "-" * 60)
                 print("EMAIL VERIFICATION REQUIRED")
                 print("-" * 60)
@@ -959,7 +1050,7 @@ class BambuPrinter:
                         verification_code=code
                     )
 
-                    self._token = token
+                    self._set_token(token)
                     print("\nAuthentication successful!")
                     print(f"Token: {token[:20]}...{token[-10:]}")
                     print("=" * 60 + "\n")
@@ -978,12 +1069,118 @@ class BambuPrinter:
                 print(f"\nAuthentication failed: {e}")
                 raise
 
+    def _set_token(self, token: str, persist: bool = True) -> None:
+        """Adopt a token, tracking when it is due for refresh"""
+        self._token = token
+        self._token_exp = _token_expiry(token)
+        self._token_refresh_at = _refresh_deadline(token)
+        if persist:
+            exp = self._token_exp
+            self._save_cached_token(token, TOKEN_CACHE_TTL if exp is None else min(TOKEN_CACHE_TTL, exp - time.time()))
+
+    def _token_refresh_due(self) -> bool:
+        return self._token_refresh_at is not None and time.time() >= self._token_refresh_at
+
+    def _schedule_refresh(self) -> None:
+        """Start a background timer that refreshes the token before it expires"""
+        self._cancel_refresh()
+        if self._token_refresh_at is None or not (self.username and self.password):
+            return
+        now = time.time()
+        delay = self._token_refresh_at - now
+        if delay <= 0:
+            delay = 0  # already due: refresh right away
+        else:
+            delay = max(delay, TOKEN_REFRESH_MIN_DELAY)
+            if self._token_exp is not None:
+                delay = min(delay, max(self._token_exp - now, 0))
+        self._refresh_timer = threading.Timer(delay, self._refresh_in_background)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def _cancel_refresh(self) -> None:
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+
+    def _refresh_in_background(self) -> None:
+        """
+        Timer callback: fetch a fresh token and re-arm the timer.
+
+        Never prompts: if BambuLab asks for a 2FA code the refresh stops and the
+        next connect() handles the login interactively.
+        """
+        old_exp = self._token_exp
+        try:
+            if self._silent:
+                with suppress_stdout():
+                    token = BambuAuthenticator().get_or_create_token(
+                        username=self.username,
+                        password=self.password
+                    )
+            else:
+                token = BambuAuthenticator().get_or_create_token(
+                    username=self.username,
+                    password=self.password
+                )
+        except Exception as e:
+            if _needs_verification(e):
+                logger.warning("BambuLab token refresh needs email verification, stopping background refresh")
+            else:
+                logger.warning(f"Proactive BambuLab token refresh failed: {e}")
+            return
+
+        self._set_token(token)
+        new_exp = self._token_exp
+        if old_exp is not None and new_exp is not None and new_exp <= old_exp:
+            # Got the same (cached) token back; re-arming would only spin on it
+            logger.warning("BambuLab returned a token that does not outlive the current one, stopping background refresh")
+            return
+        logger.info("BambuLab token refreshed ahead of expiry")
+        self._schedule_refresh()
+
+    def _load_cached_token(self) -> Optional[str]:
+        """Read the persisted token, if present, unexpired and issued for this username"""
+        if self._token_cache is None:
+            return None
+
+        with _token_cache_lock:
+            try:
+                cached = json.loads(self._token_cache.read_text())
+            except (OSError, ValueError):
+                return None
+
+        if not isinstance(cached, dict) or cached.get("username") != self.username:
+            return None
+        token, expires_at = cached.get("token"), cached.get("expires_at")
+        if not isinstance(token, str) or not isinstance(expires_at, (int, float)) or expires_at <= time.time():
+            return None
+        return token
+
+    def _save_cached_token(self, token: str, ttl: int = TOKEN_CACHE_TTL) -> None:
+        """Persist the token, readable only by the current user"""
+        if self._token_cache is None:
+            return
+
+        payload = json.dumps({"username": self.username, "token": token, "expires_at": time.time() + ttl})
+        with _token_cache_lock:
+            write_atomic(self._token_cache, payload.encode())
+
     def _ensure_token(self) -> str:
         """Ensure we have a valid token, refreshing if needed"""
         if self._token:
             logger.debug("Using existing token")
             return self._token
 
+        cached = self._load_cached_token()
+        if cached:
+            self._set_token(cached, persist=False)
+            if self._validate_token():
+                logger.debug("Using cached token")
+                return self._token
+            logger.info("Cached token rejected, re-authenticating")
+            self._token = None
+
         # No token available - need to authenticate
         print("\n" + "!" * 60)
         print("NO TOKEN FOUND")
@@ -991,6 +1188,7 @@ class BambuPrinter:
         print("Checked:")
         print("  - Constructor 'token' parameter: Not provided")
         print("  - Environment variable 'BAMBU_TOKEN': Not set")
+        print(f"  - Token cache '{self._token_cache}': No valid token")
         print()
         print("Will attempt to authenticate with username/password...")
         print("!" * 60 + "\n")
@@ -1018,8 +1216,39 @@ class BambuPrinter:
         if not data:  # Skip empty messages
             return
 
-        state = self._accumulator.update(data)
+        if not self._on_update:
+            self._accumulator.merge(data)
+            return
+        if not self._coalesce_ms:
+            self._on_update(self._accumulator.update(data))
+            return
+
+        # Printers send bursts of small deltas: merge them and report once the window closes
+        with self._flush_lock:
+            self._accumulator.merge(data)
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self._coalesce_ms / 1000, self._flush_update)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def _flush_update(self) -> None:
+        """Timer callback: pass the merged state to on_update"""
+        with self._flush_lock:
+            if self._flush_timer is None:  # already delivered by _flush_pending
+                return
+            self._flush_timer = None
+            state = self._accumulator.get_state()
+        if self._on_update:
+            self._on_update(state)
 
+    def _flush_pending(self) -> None:
+        """Deliver a merged update still waiting for its timer right away"""
+        with self._flush_lock:
+            if self._flush_timer is None:
+                return
+            self._flush_timer.cancel()
+            self._flush_timer = None
+            state = self._accumulator.get_state()
         if self._on_update:
             self._on_update(state)
 
@@ -1032,6 +1261,9 @@ class BambuPrinter:
             retry_on_auth_error: If True, refresh token and retry on auth failure.
         """
         token = self._ensure_token()
+        if self._token_refresh_due() and self.username and self.password:
+            logger.info("BambuLab token close to expiry, refreshing before connecting")
+            token = self._get_fresh_token(verification_code_timeout=self._verification_timeout)
 
         try:
             self._client = BambuClient(token=token)
@@ -1054,15 +1286,17 @@ class BambuPrinter:
                 self._device_id,
                 on_message=self._on_mqtt_message
             )
+            # Arm the refresh first: a blocking connect only returns once the session has ended
+            self._schedule_refresh()
             self._mqtt.connect(blocking=blocking)
+            if blocking:
+                self._cancel_refresh()
             self._connected = True
             logger.info(f"Connected to BambuLab printer: {self._device_id}")
 
         except Exception as e:
-            error_msg = str(e).lower()
-            is_auth_error = any(x in error_msg for x in ["401", "unauthorized", "token", "auth", "expired"])
-
-            if is_auth_error and retry_on_auth_error and self.username and self.password:
+            self._cancel_refresh()
+            if retry_on_auth_error and _is_auth_error(e) and self.username and self.password:
                 logger.warning("Auth error detected, refreshing token and retrying...")
                 self._token = None  # Clear invalid token
                 self._get_fresh_token()
@@ -1081,11 +1315,14 @@ class BambuPrinter:
 
     def disconnect(self) -> None:
         """Disconnect from MQTT"""
+        self._cancel_refresh()
         if self._mqtt:
             try:
                 self._mqtt.disconnect()
             except Exception:
                 pass
+        # After the MQTT client stops, so no delta can arrive behind the final update
+        self._flush_pending()
         self._connected = False
         logger.debug("Disconnected from BambuLab printer")
 
@@ -1121,16 +1358,17 @@ class BambuPrinter:
 
 
 # Convenience function for quick status check
-def get_printer_status(
+async def get_printer_status_async(
     username: Optional[str] = None,
     password: Optional[str] = None,
     token: Optional[str] = None,
     timeout_sec: int = 10,
 ) -> PrinterState:
     """
-    Quick function to get current printer status.
+    Quick coroutine to get current printer status.
 
-    Connects, waits for initial status update, and returns state.
+    Connects in the default executor and awaits the initial status update without
+    holding a thread while waiting, so several checks can run on one event loop.
 
     Args:
         username: BambuLab account email
@@ -1141,15 +1379,14 @@ def get_printer_status(
     Returns:
         Current PrinterState
     """
-    import threading
-
+    loop = asyncio.get_running_loop()
     received_state: List[PrinterState] = []
-    event = threading.Event()
+    event = asyncio.Event()
 
     def on_update(state: PrinterState) -> None:
         if state.sequence_id:  # Got a real update
             received_state.append(state)
-            event.set()
+            loop.call_soon_threadsafe(event.set)
 
     printer = BambuPrinter(
         username=username,
@@ -1157,19 +1394,55 @@ def get_printer_status(
         token=token,
         on_update=on_update,
         silent=True,
+        coalesce_ms=0,  # report the first update as soon as it arrives
     )
 
     try:
-        printer.connect(blocking=False)
+        await loop.run_in_executor(None, printer.connect, False)
 
         # Wait for first update
-        if event.wait(timeout=timeout_sec) and received_state:
+        try:
+            await asyncio.wait_for(event.wait(), timeout_sec)
+        except asyncio.TimeoutError:
+            pass
+        if received_state:
             return received_state[0]
-        else:
-            # Return whatever we have
-            return printer.get_state()
+        # Return whatever we have
+        return printer.get_state()
     finally:
-        printer.disconnect()
+        await loop.run_in_executor(None, printer.disconnect)
+
+
+def get_printer_status(
+    username: Optional[str] = None,
+    password: Optional[str] = None,
+    token: Optional[str] = None,
+    timeout_sec: int = 10,
+) -> PrinterState:
+    """
+    Quick function to get current printer status.
+
+    Connects, waits for initial status update, and returns state.
+    Synchronous wrapper around get_printer_status_async(). Also works when an event loop is
+    already running (async views, Jupyter), but then blocks it; await the async version there.
+
+    Args:
+        username: BambuLab account email
+        password: BambuLab account password
+        token: Pre-obtained token (optional)
+        timeout_sec: Seconds to wait for status update
+
+    Returns:
+        Current PrinterState
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(get_printer_status_async(username, password, token, timeout_sec))
+
+    # asyncio.run() refuses to nest, so run the check on a helper thread with its own loop
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, get_printer_status_async(username, password, token, timeout_sec)).result()
 
 
 # Re-export everything for convenience
@@ -1187,4 +1460,5 @@ __all__ = [
     # High-level interface
     "BambuPrinter",
     "get_printer_status",
+    "get_printer_status_async",
 ]
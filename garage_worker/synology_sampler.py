@@ -1,21 +1,42 @@
+import hashlib
+import json
 import os
 import requests
+import time
 import urllib3
 from datetime import datetime
+from pathlib import Path
+from requests.adapters import HTTPAdapter
 from typing import Optional
+from urllib3.util.retry import Retry
 from zoneinfo import ZoneInfo
 
+from garage_worker._jsonio import dumps as _dumps, write_atomic
+
 
 urllib3.disable_warnings()  # just to silence the warning while testing
 
 NAS_PORT = 5001
 DEFAULT_TIMEZONE = os.getenv("NAS_TIMEZONE", "Australia/Melbourne")
+_TZ = ZoneInfo(DEFAULT_TIMEZONE)
+SID_TTL = 3000  # seconds a cached SID is reused, below the DSM session timeout
+# Per-user directory for cached SIDs (files are created 0600)
+SID_CACHE_DIR = Path(os.getenv("NAS_SID_CACHE_DIR", Path.home() / ".cache" / "garage_worker"))
+# Unit scale factors (exact powers of two, so multiplying matches dividing)
+KB = 1.0 / 1024
+GB = 1.0 / 1024 ** 3
 
 
 class SynologySampler:
     BASE_URL = "https://{nas_ip}:{port}/webapi/entry.cgi"
 
-    def __init__(self, ip: str, port: Optional[int] = None, username: Optional[str] = None, password: Optional[str] = None):
+    UTILIZATION_API = {"api": "SYNO.Core.System.Utilization", "version": "1", "method": "get"}
+    STORAGE_API = {"api": "SYNO.Storage.CGI.Storage", "version": "1", "method": "load_info"}
+    # DSM errors meaning the SID is no longer usable: timed out, logged out elsewhere, not found
+    SESSION_ERROR_CODES = (106, 107, 119)
+
+    def __init__(self, ip: str, port: Optional[int] = None, username: Optional[str] = None,
+                 password: Optional[str] = None, cache_sid: bool = True):
         self.ip = ip
         self.port = port if port is not None else NAS_PORT
         self.username = username or os.getenv("SYNOLOGY_USER_NAME")
@@ -23,15 +44,67 @@ class SynologySampler:
         if not all([self.username, self.password]):
             raise ValueError("Missing one of the credentials: username, password")
         self.base_url = self.BASE_URL.format(nas_ip=self.ip, port=self.port)
+        # One kept-alive TLS connection to the NAS, reused by every call
         self.session = requests.Session()
-        self.sid = None
-        self._login()
+        self.session.verify = False
+        self.session.headers["Connection"] = "keep-alive"
+        self.session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=4,
+                max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+            ),
+        )
+        # With cache_sid the SID outlives the process so the next run skips the password login
+        self._sid_cache_path = self._make_sid_cache_path() if cache_sid else None
+        self.sid = self._load_cached_sid()
+        # Change detection state for get_changed_snapshot
+        self._last_snapshot_key = None
+        self._last_snapshot_at = 0.0
+        if self.sid is None:
+            self._login()
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        self.logout()
+        # A cached SID stays logged in for the next run; logout() still ends it explicitly
+        if self._sid_cache_path is None:
+            self.logout()
+        self.session.close()
+
+    def _make_sid_cache_path(self) -> Path:
+        key = hashlib.sha256(f"{self.ip}:{self.port}:{self.username}".encode()).hexdigest()[:16]
+        return SID_CACHE_DIR / f"syno_sid_{key}.json"
+
+    def _load_cached_sid(self) -> Optional[str]:
+        """SID from the cache file, if present and not expired"""
+        if self._sid_cache_path is None:
+            return None
+        try:
+            cached = json.loads(self._sid_cache_path.read_text())
+        except (OSError, ValueError):
+            return None
+        if not isinstance(cached, dict):
+            return None
+        sid, expires_at = cached.get("sid"), cached.get("expires_at")
+        if not isinstance(sid, str) or not isinstance(expires_at, (int, float)) or expires_at <= time.time():
+            return None
+        return sid
+
+    def _save_cached_sid(self) -> None:
+        """Write the SID to the cache file, readable only by the current user"""
+        if self._sid_cache_path is None:
+            return
+        write_atomic(self._sid_cache_path, json.dumps({"sid": self.sid, "expires_at": time.time() + SID_TTL}).encode())
+
+    def _clear_cached_sid(self) -> None:
+        if self._sid_cache_path is not None:
+            try:
+                self._sid_cache_path.unlink()
+            except OSError:
+                pass
 
     def _login(self) -> None:
         """Login -> get SID"""
@@ -46,7 +119,6 @@ class SynologySampler:
                 "session": "Core",
                 "format": "sid",
             },
-            verify=False,
         ).json()
         if not login.get("success"):
             code = login.get("error", {}).get("code")
@@ -55,80 +127,97 @@ class SynologySampler:
             else:
                 raise PermissionError("❌ Login failed:", login.get("error", {}))
         self.sid = login["data"]["sid"]
-
-    def synology_get(self, params) -> dict:
-        """helper to always include _sid"""
-        return self.session.get(self.base_url, params={**params, "_sid": self.sid}, verify=False).json()
-
-    def get_utilization(self) -> dict:
-        """Get system utilization"""
-        return self.synology_get(
+        self._save_cached_sid()
+
+    def synology_get(self, params, relogin: bool = True) -> dict:
+        """helper to always include _sid, logging in again once if the session has expired"""
+        result = self.session.get(self.base_url, params={**params, "_sid": self.sid}).json()
+        if relogin and not result.get("success") and result.get("error", {}).get("code") in self.SESSION_ERROR_CODES:
+            self._login()
+            result = self.session.get(self.base_url, params={**params, "_sid": self.sid}).json()
+        return result
+
+    def _compound(self, calls: list) -> list:
+        """Run several API calls in one round trip via SYNO.Entry.Request, one result per call"""
+        response = self.synology_get(
             {
-                "api": "SYNO.Core.System.Utilization",
+                "api": "SYNO.Entry.Request",
                 "version": "1",
-                "method": "get",
+                "method": "request",
+                "stop_when_error": "false",
+                "compound": json.dumps(calls),
             }
         )
+        return response["data"]["result"]
+
+    def get_utilization(self) -> dict:
+        """Get system utilization"""
+        return self.synology_get(self.UTILIZATION_API)
 
     def get_storage_info(self) -> dict:
         """Get storage information"""
-        return self.synology_get(
-            {
-                "api": "SYNO.Storage.CGI.Storage",
-                "version": "1",
-                "method": "load_info",
-            }
-        )
+        return self.synology_get(self.STORAGE_API)
 
     def logout(self) -> dict:
         """Logout from the session"""
+        self._clear_cached_sid()
         return self.synology_get(
             {
                 "api": "SYNO.API.Auth",
                 "version": "6",
                 "method": "logout",
                 "session": "Core",
-            }
+            },
+            relogin=False,
         )
 
     @staticmethod
     def now_iso(ts_int):
-        return datetime.fromtimestamp(ts_int, ZoneInfo(DEFAULT_TIMEZONE)).isoformat()
+        return datetime.fromtimestamp(ts_int, _TZ).isoformat()
+
+    def _fetch_raw(self) -> tuple:
+        """Fetch utilization and storage in one request and return their "data" payloads"""
+        util, storage = self._compound([self.UTILIZATION_API, self.STORAGE_API])
+        return util["data"], storage["data"]
 
     def get_one_sample(self) -> dict:
         """Sample and return relevant information"""
-        util = self.get_utilization()
-        storage = self.get_storage_info()
-        t = util["data"]["time"]
+        return self._shape_full(*self._fetch_raw())
+
+    def _shape_full(self, util_data: dict, storage_data: dict) -> dict:
+        cpu = util_data["cpu"]
+        mem = util_data["memory"]
+        env = storage_data["env"]
+        env_status = env["status"]
 
         payload = {
-            "ts": self.now_iso(t),
+            "ts": self.now_iso(util_data["time"]),
             "cpu": {
-                "user": util["data"]["cpu"]["user_load"],
-                "system": util["data"]["cpu"]["system_load"],
-                "other": util["data"]["cpu"]["other_load"],
-                "load_1": util["data"]["cpu"]["1min_load"],
-                "load_5": util["data"]["cpu"]["5min_load"],
-                "load_15": util["data"]["cpu"]["15min_load"],
+                "user": cpu["user_load"],
+                "system": cpu["system_load"],
+                "other": cpu["other_load"],
+                "load_1": cpu["1min_load"],
+                "load_5": cpu["5min_load"],
+                "load_15": cpu["15min_load"],
             },
             "memory": {
-                "real_usage_pct": util["data"]["memory"]["real_usage"],
-                "total_real": util["data"]["memory"]["total_real"],
-                "avail_real": util["data"]["memory"]["avail_real"],
-                "buffer": util["data"]["memory"]["buffer"],
-                "cached": util["data"]["memory"]["cached"],
-                "memory_size": util["data"]["memory"]["memory_size"],
-                "swap_usage_pct": util["data"]["memory"]["swap_usage"],
-                "total_swap": util["data"]["memory"]["total_swap"],
-                "avail_swap": util["data"]["memory"]["avail_swap"],
-                "si_disk": util["data"]["memory"]["si_disk"],
-                "so_disk": util["data"]["memory"]["so_disk"],
+                "real_usage_pct": mem["real_usage"],
+                "total_real": mem["total_real"],
+                "avail_real": mem["avail_real"],
+                "buffer": mem["buffer"],
+                "cached": mem["cached"],
+                "memory_size": mem["memory_size"],
+                "swap_usage_pct": mem["swap_usage"],
+                "total_swap": mem["total_swap"],
+                "avail_swap": mem["avail_swap"],
+                "si_disk": mem["si_disk"],
+                "so_disk": mem["so_disk"],
             },
             # Network (counters direct)
-            "network": util["data"]["network"],
+            "network": util_data["network"],
             # Disk I/O snapshot (counters)
-            "disks_util": util["data"]["disk"]["disk"],
-            "space": util["data"]["space"]["volume"],
+            "disks_util": util_data["disk"]["disk"],
+            "space": util_data["space"]["volume"],
             # Pools (RAID groups)
             "pools": [
                 {
@@ -138,7 +227,7 @@ class SynologySampler:
                     "used": p["size"]["used"],
                     "total": p["size"]["total"],
                 }
-                for p in storage["data"]["storagePools"]
+                for p in storage_data["storagePools"]
             ],
             # Volumes (filesystems created inside those Pools)
             "volumes": [
@@ -149,7 +238,7 @@ class SynologySampler:
                     "used": v["size"]["used"],
                     "total": v["size"]["total"],
                 }
-                for v in storage["data"]["volumes"]
+                for v in storage_data["volumes"]
             ],
             # Hardware monitoring: disks
             "hardware": [
@@ -161,15 +250,15 @@ class SynologySampler:
                     "smart_status": d["smart_status"],
                     "status": d["status"],
                 }
-                for d in storage["data"]["disks"]
+                for d in storage_data["disks"]
             ],
             # System / chassis info
             "env": {
-                "model_name": storage["data"]["env"]["model_name"],
-                "bay_number": storage["data"]["env"]["bay_number"],
-                "system_crashed": storage["data"]["env"]["status"]["system_crashed"],
-                "system_need_repair": storage["data"]["env"]["status"]["system_need_repair"],
-                "system_rebuilding": storage["data"]["env"]["status"]["system_rebuilding"],
+                "model_name": env["model_name"],
+                "bay_number": env["bay_number"],
+                "system_crashed": env_status["system_crashed"],
+                "system_need_repair": env_status["system_need_repair"],
+                "system_rebuilding": env_status["system_rebuilding"],
             },
         }
         return payload
@@ -185,52 +274,75 @@ class SynologySampler:
         - Disk temperatures and health status
         - System status
         """
-        raw_data = self.get_one_sample()
+        return self._shape_snapshot(*self._fetch_raw())
 
-        # Calculate total network traffic
-        total_network = next((net for net in raw_data['network'] if net['device'] == 'total'), None)
+    def _shape_snapshot(self, util_data: dict, storage_data: dict) -> dict:
+        # Reads the API payloads directly, without building the full sample first
+        cpu = util_data['cpu']
+        m = util_data['memory']
+        env = storage_data['env']
+        env_status = env['status']
 
-        # Calculate total storage usage across volumes
-        total_storage_used = sum(int(v['used']) for v in raw_data['volumes'])
-        total_storage_capacity = sum(int(v['total']) for v in raw_data['volumes'])
+        # Calculate total network traffic
+        total_network = next((net for net in util_data['network'] if net['device'] == 'total'), None)
+
+        # Calculate total storage usage across volumes (one pass for used and capacity)
+        total_storage_used = 0
+        total_storage_capacity = 0
+        for v in storage_data['volumes']:
+            size = v['size']
+            total_storage_used += int(size['used'])
+            total_storage_capacity += int(size['total'])
         storage_usage_pct = round((total_storage_used / total_storage_capacity * 100), 2) if total_storage_capacity > 0 else 0
 
-        # Get disk health summary
-        all_disks_healthy = all(d['status'] == 'normal' and d['smart_status'] == 'normal' for d in raw_data['hardware'])
-
-        # Get max disk temperature
-        max_disk_temp = max((d['temp_c'] for d in raw_data['hardware']), default=0)
+        # Disk temperatures and health summary, collected in a single pass over the disks
+        disk_temperatures = []
+        disk_health = []
+        all_disks_healthy = True
+        max_disk_temp = 0
+        for d in storage_data['disks']:
+            temp_c = d['temp']
+            disk_temperatures.append({'disk': d['id'], 'temp_c': temp_c})
+            disk_health.append({
+                'disk': d['id'],
+                'model': d['model'],
+                'status': d['status'],
+                'smart_status': d['smart_status']
+            })
+            if d['status'] != 'normal' or d['smart_status'] != 'normal':
+                all_disks_healthy = False
+            if temp_c > max_disk_temp:
+                max_disk_temp = temp_c
 
         # Create simplified snapshot
         snapshot = {
-            'timestamp': raw_data['ts'],
+            'timestamp': self.now_iso(util_data['time']),
 
             # CPU metrics
-            'cpu_load_1min': raw_data['cpu']['load_1'],
-            'cpu_load_5min': raw_data['cpu']['load_5'],
-            'cpu_load_15min': raw_data['cpu']['load_15'],
-            'cpu_user_pct': raw_data['cpu']['user'],
-            'cpu_system_pct': raw_data['cpu']['system'],
+            'cpu_load_1min': cpu['1min_load'],
+            'cpu_load_5min': cpu['5min_load'],
+            'cpu_load_15min': cpu['15min_load'],
+            'cpu_user_pct': cpu['user_load'],
+            'cpu_system_pct': cpu['system_load'],
 
             # Memory metrics
-            'memory_usage_pct': raw_data['memory']['real_usage_pct'],
-            'memory_total_mb': round(raw_data['memory']['total_real'] / 1024, 2),
-            'memory_available_mb': round(raw_data['memory']['avail_real'] / 1024, 2),
+            'memory_usage_pct': m['real_usage'],
+            'memory_total_mb': round(m['total_real'] * KB, 2),
+            'memory_available_mb': round(m['avail_real'] * KB, 2),
 
             # Memory composition (for stacked chart)
-            'memory_reserved_mb': round((raw_data['memory']['memory_size'] - raw_data['memory']['total_real']) / 1024, 2),
-            'memory_used_mb': round((raw_data['memory']['total_real'] - raw_data['memory']['avail_real'] -
-                                    raw_data['memory']['buffer'] - raw_data['memory']['cached']) / 1024, 2),
-            'memory_buffer_mb': round(raw_data['memory']['buffer'] / 1024, 2),
-            'memory_cached_mb': round(raw_data['memory']['cached'] / 1024, 2),
-            'memory_free_mb': round(raw_data['memory']['avail_real'] / 1024, 2),
-            'memory_physical_size_mb': round(raw_data['memory']['memory_size'] / 1024, 2),
+            'memory_reserved_mb': round((m['memory_size'] - m['total_real']) * KB, 2),
+            'memory_used_mb': round((m['total_real'] - m['avail_real'] - m['buffer'] - m['cached']) * KB, 2),
+            'memory_buffer_mb': round(m['buffer'] * KB, 2),
+            'memory_cached_mb': round(m['cached'] * KB, 2),
+            'memory_free_mb': round(m['avail_real'] * KB, 2),
+            'memory_physical_size_mb': round(m['memory_size'] * KB, 2),
 
             # Swap metrics
-            'swap_usage_pct': raw_data['memory']['swap_usage_pct'],
-            'swap_total_mb': round(raw_data['memory']['total_swap'] / 1024, 2),
-            'swap_available_mb': round(raw_data['memory']['avail_swap'] / 1024, 2),
-            'swap_used_mb': round((raw_data['memory']['total_swap'] - raw_data['memory']['avail_swap']) / 1024, 2),
+            'swap_usage_pct': m['swap_usage'],
+            'swap_total_mb': round(m['total_swap'] * KB, 2),
+            'swap_available_mb': round(m['avail_swap'] * KB, 2),
+            'swap_used_mb': round((m['total_swap'] - m['avail_swap']) * KB, 2),
 
             # Network metrics (bytes/sec or cumulative counters)
             'network_rx_bytes': total_network['rx'] if total_network else 0,
@@ -238,52 +350,73 @@ class SynologySampler:
 
             # Storage metrics
             'storage_usage_pct': storage_usage_pct,
-            'storage_used_gb': round(total_storage_used / (1024**3), 2),
-            'storage_total_gb': round(total_storage_capacity / (1024**3), 2),
+            'storage_used_gb': round(total_storage_used * GB, 2),
+            'storage_total_gb': round(total_storage_capacity * GB, 2),
 
             # Temperature metrics
             'max_disk_temp_c': max_disk_temp,
-            'disk_temperatures': [
-                {'disk': d['id'], 'temp_c': d['temp_c']}
-                for d in raw_data['hardware']
-            ],
+            'disk_temperatures': disk_temperatures,
 
             # Health metrics
             'all_disks_healthy': all_disks_healthy,
-            'disk_health': [
-                {
-                    'disk': d['id'],
-                    'model': d['model'],
-                    'status': d['status'],
-                    'smart_status': d['smart_status']
-                }
-                for d in raw_data['hardware']
-            ],
+            'disk_health': disk_health,
 
             # RAID/Pool status
             'pools_status': [
                 {
                     'id': p['id'],
                     'status': p['status'],
-                    'usage_pct': round((int(p['used']) / int(p['total']) * 100), 2) if int(p['total']) > 0 else 0
+                    'usage_pct': round((int(p['size']['used']) / int(p['size']['total']) * 100), 2) if int(p['size']['total']) > 0 else 0
                 }
-                for p in raw_data['pools']
+                for p in storage_data['storagePools']
             ],
 
             # System status
             'system_healthy': not any([
-                raw_data['env']['system_crashed'],
-                raw_data['env']['system_need_repair'],
-                raw_data['env']['system_rebuilding']
+                env_status['system_crashed'],
+                env_status['system_need_repair'],
+                env_status['system_rebuilding']
             ]),
             'system_status': {
-                'crashed': raw_data['env']['system_crashed'],
-                'needs_repair': raw_data['env']['system_need_repair'],
-                'rebuilding': raw_data['env']['system_rebuilding']
+                'crashed': env_status['system_crashed'],
+                'needs_repair': env_status['system_need_repair'],
+                'rebuilding': env_status['system_rebuilding']
             },
 
             # Model info
-            'model': raw_data['env']['model_name'],
+            'model': env['model_name'],
         }
 
         return snapshot
+
+    def get_system_snapshot_bytes(self) -> bytes:
+        """Get the system snapshot already serialized to JSON
+
+        Preferred for database logging: the bytes can go straight into the row without
+        the ORM encoding the dict a second time.
+        """
+        return _dumps(self.get_system_snapshot())
+
+    def get_changed_snapshot(self, max_quiet: float = 60) -> Optional[dict]:
+        """Get a system snapshot only if it differs from the last one returned
+
+        Compares network counters, storage usage, max disk temperature and health flags
+        with the previously returned snapshot. Returns None when nothing changed and less
+        than max_quiet seconds have passed, so pollers can skip logging duplicate rows.
+        """
+        snapshot = self.get_system_snapshot()
+        key = (
+            snapshot['network_rx_bytes'],
+            snapshot['network_tx_bytes'],
+            snapshot['storage_usage_pct'],
+            snapshot['max_disk_temp_c'],
+            snapshot['all_disks_healthy'],
+            snapshot['system_healthy'],
+        )
+        now = time.monotonic()
+        if key == self._last_snapshot_key and now - self._last_snapshot_at < max_quiet:
+            return None
+
+        self._last_snapshot_key = key
+        self._last_snapshot_at = now
+        return snapshot
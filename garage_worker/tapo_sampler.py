@@ -6,11 +6,46 @@ Returns a clean dict suitable for direct saving into a Django model JSONField.
 from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 import asyncio
-from typing import Any, Dict, Optional
+import threading
+from typing import Any, Callable, Dict, Optional
 
 from tapo import ApiClient
 
+from garage_worker._jsonio import dumps as _dumps
+
 DEFAULT_TZ = "Australia/Melbourne"
+_TZ = ZoneInfo(DEFAULT_TZ)
+
+# Event loop shared by the sync wrappers, running in a daemon thread so connections outlive each call
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="tapo-sampler-loop", daemon=True).start()
+        return _loop
+
+
+def _raw(obj: Any) -> Dict:
+    return {"raw": str(obj)}
+
+
+def _via_to_dict(obj: Any) -> Dict:
+    try:
+        return obj.to_dict() or {}
+    except Exception:
+        return _raw(obj)
+
+
+# Conversion picked per result type; the tapo objects come from a handful of classes
+_dispatch: Dict[type, Callable[[Any], Dict]] = {
+    type(None): lambda obj: {},
+    dict: lambda obj: obj,
+}
 
 
 def _obj_to_dict(obj: Any) -> Dict:
@@ -18,29 +53,31 @@ def _obj_to_dict(obj: Any) -> Dict:
     Convert tapo return objects to simple dicts.
     If object has to_dict(), call it; if it's already a dict return it; otherwise stringify.
     """
-    if obj is None:
-        return {}
-    if isinstance(obj, dict):
-        return obj
-    if hasattr(obj, "to_dict") and callable(getattr(obj, "to_dict")):
-        try:
-            return obj.to_dict() or {}
-        except Exception:
-            return {"raw": str(obj)}
-    # fallback
-    return {"raw": str(obj)}
+    t = type(obj)
+    fn = _dispatch.get(t)
+    if fn is None:
+        if isinstance(obj, dict):
+            fn = _dispatch[dict]
+        elif callable(getattr(t, "to_dict", None)):
+            fn = _via_to_dict
+        else:
+            # fallback
+            fn = _raw
+        _dispatch[t] = fn
+    return fn(obj)
 
 
-def _now_iso(tz_name: str = DEFAULT_TZ) -> str:
-    return datetime.now(tz=ZoneInfo(tz_name)).isoformat()
+def _now_iso(tz: ZoneInfo = _TZ) -> str:
+    return datetime.now(tz).isoformat()
 
 
 class TapoSampler:
     """
     Simple synchronous-friendly wrapper.
-    Usage (sync):
+    Usage (sync, the connection is kept between samples):
         s = TapoSampler("you@example.com", "pw", "192.168.1.123")
         sample = s.get_one_sample_sync()
+        s.close_sync()
     Or async:
         await s.connect()
         sample = await s.get_one_sample()
@@ -52,6 +89,7 @@ class TapoSampler:
         self.password = password
         self.ip = ip
         self.tz_name = tz_name
+        self._tz = _TZ if tz_name == DEFAULT_TZ else ZoneInfo(tz_name)
         self._client: Optional[ApiClient] = None
         self._device = None
         self._connected = False
@@ -81,7 +119,7 @@ class TapoSampler:
             return
 
     # --- main async collector ---
-    async def get_one_sample(self, pause_after_on: float = 0.5) -> Dict:
+    async def get_one_sample(self, pause_after_on: float = 0.0) -> Dict:
         """
         Collects:
          - get_current_power()
@@ -98,12 +136,13 @@ class TapoSampler:
             "energy_usage": {...},
             "errors": {"current_power": "...", ...}  # present if any call raises
         }
+        Callers that just toggled the device should pass pause_after_on=0.5 so readings settle first.
         """
         if not self._connected:
             await self.connect()
 
         out: Dict[str, Any] = {
-            "timestamp": _now_iso(self.tz_name),
+            "timestamp": _now_iso(self._tz),
             "device_ip": self.ip,
         }
         errors: Dict[str, str] = {}
@@ -112,9 +151,22 @@ class TapoSampler:
         if pause_after_on:
             await asyncio.sleep(pause_after_on)
 
+        results = await self._read_all()
+        if all(isinstance(r, BaseException) for r in results):
+            # Every read failed: the kept-alive session has most likely expired, so reconnect and retry once.
+            # If the device is unreachable, keep the original failures so they still end up in "errors"
+            try:
+                await self.close()
+                await self.connect()
+                results = await self._read_all()
+            except Exception:
+                pass
+        cur, usage, energy, info = results
+
         # 1. current power
         try:
-            cur = await self._device.get_current_power()
+            if isinstance(cur, BaseException):
+                raise cur
             curd = _obj_to_dict(cur)
             # common keys: current_power / power / value
             power = curd.get("current_power") or curd.get("power") or curd.get("value")
@@ -124,39 +176,38 @@ class TapoSampler:
             errors["current_power"] = str(exc)
             out["power_w"] = None
 
-        # 2. device usage (totals: today / 7 / 30)
-        try:
-            usage = await self._device.get_device_usage()
-            out["device_usage"] = _obj_to_dict(usage)
-        except Exception as exc:
-            errors["device_usage"] = str(exc)
-            out["device_usage"] = {}
-
-        # 3. energy usage (energy object / aggregates)
-        try:
-            energy = await self._device.get_energy_usage()
-            out["energy_usage"] = _obj_to_dict(energy)
-        except Exception as exc:
-            errors["energy_usage"] = str(exc)
-            out["energy_usage"] = {}
-
-        # 4. device info (baseline metadata)
-        try:
-            info = await self._device.get_device_info()
-            out["device_info"] = _obj_to_dict(info)
-        except Exception as exc:
-            errors["device_info"] = str(exc)
-            out["device_info"] = {}
+        # 2.-4. device usage (totals: today / 7 / 30), energy usage (aggregates), device info (baseline metadata)
+        for name, result in (("device_usage", usage), ("energy_usage", energy), ("device_info", info)):
+            if isinstance(result, BaseException):
+                errors[name] = str(result)
+                out[name] = {}
+            else:
+                out[name] = _obj_to_dict(result)
 
         if errors:
             out["errors"] = errors
 
         return out
 
+    async def get_one_sample_bytes(self, pause_after_on: float = 0.0) -> bytes:
+        """get_one_sample() serialized to JSON, preferred when the sample goes straight to the database"""
+        return _dumps(await self.get_one_sample(pause_after_on=pause_after_on))
+
+    async def _read_all(self) -> tuple:
+        """The four reads are independent, so issue them concurrently and wait for the slowest"""
+        return await asyncio.gather(
+            self._device.get_current_power(),
+            self._device.get_device_usage(),
+            self._device.get_energy_usage(),
+            self._device.get_device_info(),
+            return_exceptions=True,
+        )
+
     # --- sync wrapper (convenience) ---
-    def get_one_sample_sync(self, pause_after_on: float = 0.5) -> Dict:
+    def get_one_sample_sync(self, pause_after_on: float = 0.0) -> Dict:
         """
-        Synchronous convenience wrapper. Uses asyncio.run().
+        Synchronous convenience wrapper. Runs on a shared background event loop and keeps
+        the device connection open between calls; use close_sync() to release it.
         WARNING: will raise RuntimeError if called inside an already-running event loop.
         """
         try:
@@ -167,11 +218,14 @@ class TapoSampler:
         if loop and loop.is_running():
             raise RuntimeError("An event loop is already running. Call get_one_sample() (async) instead.")
 
-        async def _inner():
-            await self.connect()
-            try:
-                return await self.get_one_sample(pause_after_on=pause_after_on)
-            finally:
-                await self.close()
+        future = asyncio.run_coroutine_threadsafe(self.get_one_sample(pause_after_on=pause_after_on), _background_loop())
+        return future.result()
+
+    def get_one_sample_bytes_sync(self, pause_after_on: float = 0.0) -> bytes:
+        """Synchronous counterpart of get_one_sample_bytes()"""
+        return _dumps(self.get_one_sample_sync(pause_after_on=pause_after_on))
 
-        return asyncio.run(_inner())
+    def close_sync(self) -> None:
+        """Close a connection opened by get_one_sample_sync()"""
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self.close(), _background_loop()).result()